@@ -7,6 +7,9 @@ from google.adk.agents.callback_context import CallbackContext
 from google.adk.models import LlmResponse
 from utils.output_formatter import OutputFormatter
 
+# Shared so repeated responses hit the formatter's output cache
+_formatter = OutputFormatter()
+
 
 def format_model_output(
     callback_context: CallbackContext,
@@ -43,8 +46,7 @@ def format_model_output(
         return None
 
     # Format the output
-    formatter = OutputFormatter()
-    formatted_text = formatter.format(original_text)
+    formatted_text = _formatter.format(original_text)
 
     # If no changes, return None to use original
     if formatted_text == original_text:
@@ -1,7 +1,31 @@
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
+from functools import cached_property
 from pydantic import BaseModel, Field
 
+# Bit assigned to each certification a shift can require; add new ones here
+CERT_BITS: Dict[str, int] = {"BLS": 1, "ACLS": 2, "ICU": 4}
+# Reserved bit for required certifications missing from CERT_BITS; no nurse
+# mask ever has it, so such a requirement is never met
+UNKNOWN_CERT_BIT = 1 << len(CERT_BITS)
+
+
+def cert_mask(certifications: List[str], required: bool = False) -> int:
+    """
+    Encode a list of certifications as a CERT_BITS bitmask.
+
+    Certifications missing from CERT_BITS add nothing to a nurse's mask; in a
+    list of required certifications (required=True) they set UNKNOWN_CERT_BIT.
+    """
+    mask = 0
+    for cert in certifications:
+        bit = CERT_BITS.get(cert)
+        if bit is not None:
+            mask |= bit
+        elif required:
+            mask |= UNKNOWN_CERT_BIT
+    return mask
+
 class NursePreferences(BaseModel):
     avoid_night_shifts: bool = False
     preferred_days: List[str] = Field(default_factory=list)
@@ -21,6 +45,11 @@ class Nurse(BaseModel):
     preferences: NursePreferences
     history_summary: NurseHistory
 
+    @cached_property
+    def cert_mask(self) -> int:
+        """Certifications as a CERT_BITS bitmask, computed once per nurse."""
+        return cert_mask(self.certifications)
+
 class Shift(BaseModel):
     id: str
     ward: str
@@ -29,6 +58,30 @@ class Shift(BaseModel):
     required_certifications: List[str] = Field(default_factory=list)
     min_level: str
 
+    @cached_property
+    def duration_hours(self) -> float:
+        """Shift length in hours, computed once per shift."""
+        duration = self.end_time - self.start_time
+        # Handle overnight shifts
+        if duration.total_seconds() < 0:
+            duration += timedelta(days=1)
+        return duration.total_seconds() / 3600
+
+    @cached_property
+    def cert_mask(self) -> int:
+        """Required certifications as a CERT_BITS bitmask, computed once per shift."""
+        return cert_mask(self.required_certifications, required=True)
+
+    @cached_property
+    def start_hour(self) -> int:
+        """Hour of day the shift starts, read once from start_time."""
+        return self.start_time.hour
+
+    @cached_property
+    def is_night(self) -> bool:
+        """Night shifts start between 20:00 and 06:00."""
+        return self.start_hour >= 20 or self.start_hour < 6
+
 class Assignment(BaseModel):
     nurse_id: str
     shift_id: str
@@ -0,0 +1,104 @@
+"""
+Tests for simulate_staffing_change (hire and promote simulations).
+
+Usage:
+    pytest tests/test_simulate_staffing.py -v
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add project root to path
+PROJECT_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(PROJECT_ROOT))
+
+import tools.data_loader as data_loader
+import tools.history_tools as history_tools
+from models.domain import Nurse, NursePreferences, NurseHistory
+from tools.solver_tool import simulate_staffing_change
+
+
+def _nurse(nurse_id: str, level: str, certs: list) -> Nurse:
+    return Nurse(
+        id=nurse_id,
+        name=nurse_id.replace("_", " ").title(),
+        certifications=certs,
+        seniority_level=level,
+        contract_type="FullTime",
+        preferences=NursePreferences(),
+        history_summary=NurseHistory(),
+    )
+
+
+@pytest.fixture
+def team(monkeypatch):
+    """A small team that cannot cover a week alone; stats start empty."""
+    nurses = [
+        _nurse("nurse_001", "Senior", ["ACLS", "BLS", "ICU"]),
+        _nurse("nurse_002", "Mid", ["ACLS", "BLS"]),
+        _nurse("nurse_003", "Junior", ["BLS"]),
+    ]
+    stats = {}
+    monkeypatch.setattr(data_loader, "load_nurses", lambda: nurses)
+    monkeypatch.setattr(history_tools, "_load_json", lambda path: stats)
+    return nurses, stats
+
+
+def _snapshot(nurses: list) -> list:
+    return [n.model_dump() for n in nurses]
+
+
+def test_promote_simulates_new_level_without_mutating_nurses(team):
+    nurses, _ = team
+    before = _snapshot(nurses)
+
+    result = json.loads(simulate_staffing_change(
+        action="promote", nurse_id="nurse_002", new_level="Senior", start_date="2025-12-08"
+    ))
+
+    assert "error" not in result
+    assert result["simulated_changes"] == [{
+        "type": "promote",
+        "nurse": "Nurse 002",
+        "nurse_id": "nurse_002",
+        "from_level": "Mid",
+        "to_level": "Senior",
+    }]
+    assert result["after"] is not None
+    assert _snapshot(nurses) == before
+
+
+def test_promote_rejects_same_or_lower_level(team):
+    result = json.loads(simulate_staffing_change(
+        action="promote", nurse_id="nurse_001", new_level="Mid", start_date="2025-12-08"
+    ))
+
+    assert "already Senior" in result["error"]
+
+
+def test_promote_unknown_nurse(team):
+    result = json.loads(simulate_staffing_change(
+        action="promote", nurse_id="nurse_999", new_level="Senior", start_date="2025-12-08"
+    ))
+
+    assert result["error"] == "Nurse 'nurse_999' not found."
+
+
+def test_hire_adds_simulated_nurses_without_mutating_inputs(team):
+    nurses, stats = team
+    before = _snapshot(nurses)
+
+    result = json.loads(simulate_staffing_change(action="hire", start_date="2025-12-08"))
+
+    hires = result["simulated_changes"]
+    assert hires and all(change["type"] == "hire" for change in hires)
+    assert all(change["nurse_id"].startswith("sim_nurse_") for change in hires)
+    # One posting per distinct role
+    roles = {(c["seniority"], c["target_ward"], tuple(c["certifications"])) for c in hires}
+    assert len(result["recommended_job_postings"]) == len(roles)
+    assert len(nurses) == 3
+    assert _snapshot(nurses) == before
+    assert stats == {}
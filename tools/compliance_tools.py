@@ -11,6 +11,8 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 
+from tools.history_tools import _load_history, _save_history
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), "../data")
 ROSTERS_DIR = os.path.join(DATA_DIR, "rosters")
 
@@ -327,18 +329,17 @@ def validate_roster_compliance(roster_id: str = "") -> str:
         roster_data["metadata"]["compliance_notes"] = compliance_notes
         _save_json(roster_file, roster_data)
 
-        # Also update shift_history.json to keep in sync
-        history_file = os.path.join(DATA_DIR, "shift_history.json")
-        if os.path.exists(history_file):
-            history = _load_json(history_file)
-            for log in history.get("logs", []):
-                if log.get("roster_id") == roster_id or log.get("id") == roster_id:
-                    if "metadata" not in log:
-                        log["metadata"] = {}
-                    log["metadata"]["compliance_status"] = compliance_status
-                    log["metadata"]["compliance_notes"] = compliance_notes
-                    break
-            _save_json(history_file, history)
+        # Also update the shift history to keep in sync. Go through the history
+        # tools so entries still in the append log are seen and folded in.
+        history = _load_history()
+        for log in history.get("logs", []):
+            if log.get("roster_id") == roster_id or log.get("id") == roster_id:
+                if "metadata" not in log:
+                    log["metadata"] = {}
+                log["metadata"]["compliance_status"] = compliance_status
+                log["metadata"]["compliance_notes"] = compliance_notes
+                _save_history(history)
+                break
 
     return result
 
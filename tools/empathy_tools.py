@@ -10,6 +10,8 @@ import os
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 
+from tools.history_tools import _load_history, _save_history
+
 DATA_DIR = os.path.join(os.path.dirname(__file__), "../data")
 ROSTERS_DIR = os.path.join(DATA_DIR, "rosters")
 NURSE_STATS_FILE = os.path.join(DATA_DIR, "nurse_stats.json")
@@ -488,17 +490,16 @@ def analyze_roster_fairness(roster_id: str = "") -> str:
         roster_data["metadata"]["empathy_notes"] = empathy_notes
         _save_json(roster_file, roster_data)
 
-        # Also update shift_history.json to keep in sync
-        history_file = os.path.join(DATA_DIR, "shift_history.json")
-        if os.path.exists(history_file):
-            history = _load_json(history_file)
-            for log in history.get("logs", []):
-                if log.get("roster_id") == roster_id or log.get("id") == roster_id:
-                    if "metadata" not in log:
-                        log["metadata"] = {}
-                    log["metadata"]["empathy_score"] = empathy_score
-                    log["metadata"]["empathy_notes"] = empathy_notes
-                    break
-            _save_json(history_file, history)
+        # Also update the shift history to keep in sync. Go through the history
+        # tools so entries still in the append log are seen and folded in.
+        history = _load_history()
+        for log in history.get("logs", []):
+            if log.get("roster_id") == roster_id or log.get("id") == roster_id:
+                if "metadata" not in log:
+                    log["metadata"] = {}
+                log["metadata"]["empathy_score"] = empathy_score
+                log["metadata"]["empathy_notes"] = empathy_notes
+                _save_history(history)
+                break
 
     return result
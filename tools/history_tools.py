@@ -7,13 +7,16 @@ Provides tools for:
 - Comparing rosters
 """
 
+import glob
 import json
 import os
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "../data")
 SHIFT_HISTORY_FILE = os.path.join(DATA_DIR, "shift_history.json")
+SHIFT_HISTORY_LOG = os.path.join(DATA_DIR, "shift_history.jsonl")
 NURSE_STATS_FILE = os.path.join(DATA_DIR, "nurse_stats.json")
 ROSTERS_DIR = os.path.join(DATA_DIR, "rosters")
 
@@ -39,6 +42,77 @@ def _save_json(filepath: str, data: dict) -> None:
         json.dump(data, f, indent=2, default=str)
 
 
+def _claim_history_logs() -> list:
+    """
+    Move the live history log aside and return every log set aside so far.
+
+    The solver keeps appending to SHIFT_HISTORY_LOG; once renamed, a log only
+    changes if an append was already under way, so the files returned here can be
+    folded into the history and removed without losing later entries. Set-aside
+    logs are named by time so they sort in the order they were written.
+    """
+    try:
+        os.rename(SHIFT_HISTORY_LOG, f"{SHIFT_HISTORY_LOG}.{time.time_ns():020d}-{os.getpid()}.pending")
+    except FileNotFoundError:
+        pass
+    return sorted(glob.glob(f"{glob.escape(SHIFT_HISTORY_LOG)}.*.pending"))
+
+
+def _load_history() -> dict:
+    """
+    Load shift history, including entries appended to the history log.
+
+    The solver appends generated rosters to shift_history.jsonl (one JSON entry
+    per line) instead of rewriting shift_history.json. They are replayed here
+    in order, replacing any earlier entry with the same roster ID. The logs read
+    are remembered under "_pending_logs" so _save_history() removes only those.
+    """
+    history = _load_json(SHIFT_HISTORY_FILE)
+    pending_logs = _claim_history_logs()
+    if not pending_logs:
+        return history
+
+    logs = history.setdefault("logs", [])
+    # Positions of the entries known under each roster ID, built once
+    positions = {}
+    for i, log in enumerate(logs):
+        for key in {log.get("roster_id"), log.get("id")} - {None}:
+            positions.setdefault(key, []).append(i)
+    replaced = set()
+
+    for path in pending_logs:
+        try:
+            with open(path, "r") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            continue  # Folded and removed by another save meanwhile
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Blank or partially written line
+            roster_id = entry.get("roster_id")
+            replaced.update(positions.pop(roster_id, ()))
+            positions[roster_id] = [len(logs)]
+            logs.append(entry)
+
+    if replaced:
+        logs[:] = [log for i, log in enumerate(logs) if i not in replaced]
+    history["_pending_logs"] = pending_logs
+    return history
+
+
+def _save_history(history: dict) -> None:
+    """Save shift history and remove the logs _load_history() folded into it."""
+    pending_logs = history.pop("_pending_logs", [])
+    _save_json(SHIFT_HISTORY_FILE, history)
+    for path in pending_logs:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
 def _get_shift_type(start_time: str) -> str:
     """Determine shift type based on start time."""
     try:
@@ -87,7 +161,7 @@ def get_scheduled_periods() -> list:
     Returns:
         List of dicts with roster_id, status, start, end dates.
     """
-    history = _load_json(SHIFT_HISTORY_FILE)
+    history = _load_history()
     periods = []
 
     for log in history.get("logs", []):
@@ -246,7 +320,7 @@ def get_shift_history(weeks: int = 12) -> str:
     Returns:
         Formatted string with roster history including dates, assignments, and scores.
     """
-    history = _load_json(SHIFT_HISTORY_FILE)
+    history = _load_history()
     logs = history.get("logs", [])
 
     if not logs:
@@ -369,7 +443,7 @@ def get_roster_by_id(roster_id: str) -> str:
         roster = _load_json(roster_file)
     else:
         # Check in history logs
-        history = _load_json(SHIFT_HISTORY_FILE)
+        history = _load_history()
         roster = None
         for log in history.get("logs", []):
             if log.get("roster_id") == roster_id or log.get("id") == roster_id:
@@ -539,7 +613,7 @@ def get_nurse_history(nurse_id: str, weeks: int = 12) -> str:
     Returns:
         Formatted string with the nurse's shift history and patterns.
     """
-    history = _load_json(SHIFT_HISTORY_FILE)
+    history = _load_history()
     stats = _load_json(NURSE_STATS_FILE)
 
     nurse_stats = stats.get(nurse_id, {})
@@ -992,7 +1066,7 @@ def save_draft_roster(roster_json: str) -> str:
     _save_json(roster_file, roster)
 
     # Add to history log
-    history = _load_json(SHIFT_HISTORY_FILE)
+    history = _load_history()
     if "logs" not in history:
         history["logs"] = []
 
@@ -1003,7 +1077,7 @@ def save_draft_roster(roster_json: str) -> str:
     # Remove existing draft with same ID
     history["logs"] = [l for l in history["logs"] if l.get("roster_id") != roster_id]
     history["logs"].append(history_entry)
-    _save_json(SHIFT_HISTORY_FILE, history)
+    _save_history(history)
 
     assignment_count = len(roster.get("assignments", []))
     return f"✅ Draft roster saved: {roster_id}\n   Assignments: {assignment_count}\n   Status: DRAFT (awaiting approval)\n   Use finalize_roster('{roster_id}') to approve."
@@ -1219,12 +1293,12 @@ def finalize_roster(roster_id: str) -> str:
                             # No assignments left - delete the roster
                             os.remove(existing_file)
                             # Remove from history
-                            history = _load_json(SHIFT_HISTORY_FILE)
+                            history = _load_history()
                             history["logs"] = [
                                 l for l in history.get("logs", [])
                                 if l.get("roster_id") != p["roster_id"] and l.get("id") != p["roster_id"]
                             ]
-                            _save_json(SHIFT_HISTORY_FILE, history)
+                            _save_history(history)
                             overwrite_messages.append(
                                 f"   - Deleted '{p['roster_id']}' (all shifts overwritten)"
                             )
@@ -1239,12 +1313,12 @@ def finalize_roster(roster_id: str) -> str:
                             _save_json(existing_file, existing_roster)
 
                             # Update history
-                            history = _load_json(SHIFT_HISTORY_FILE)
+                            history = _load_history()
                             for log in history.get("logs", []):
                                 if log.get("roster_id") == p["roster_id"] or log.get("id") == p["roster_id"]:
                                     log["period"] = existing_roster["period"]
                                     break
-                            _save_json(SHIFT_HISTORY_FILE, history)
+                            _save_history(history)
 
                             overwrite_messages.append(
                                 f"   - Trimmed '{p['roster_id']}' to {existing_roster['period']['start']} - {existing_roster['period']['end']} "
@@ -1309,13 +1383,13 @@ def finalize_roster(roster_id: str) -> str:
     _save_json(NURSE_STATS_FILE, stats)
 
     # Update history log
-    history = _load_json(SHIFT_HISTORY_FILE)
+    history = _load_history()
     for log in history.get("logs", []):
         if log.get("roster_id") == roster_id:
             log["status"] = "finalized"
             log["finalized_at"] = roster["finalized_at"]
             break
-    _save_json(SHIFT_HISTORY_FILE, history)
+    _save_history(history)
 
     result = f"✅ Roster '{roster_id}' has been FINALIZED.\n\n"
 
@@ -1365,14 +1439,14 @@ def reject_roster(roster_id: str, reason: str = "") -> str:
     _save_json(roster_file, roster)
 
     # Update history log
-    history = _load_json(SHIFT_HISTORY_FILE)
+    history = _load_history()
     for log in history.get("logs", []):
         if log.get("roster_id") == roster_id:
             log["status"] = "rejected"
             log["rejected_at"] = roster["rejected_at"]
             log["rejection_reason"] = roster["rejection_reason"]
             break
-    _save_json(SHIFT_HISTORY_FILE, history)
+    _save_history(history)
 
     return f"❌ Roster '{roster_id}' has been REJECTED.\n   Reason: {roster['rejection_reason']}"
 
@@ -1459,14 +1533,14 @@ def delete_roster(roster_id: str) -> str:
         return f"Error deleting roster file: {e}"
 
     # Remove from history log - handle both 'id' and 'roster_id' keys
-    history = _load_json(SHIFT_HISTORY_FILE)
+    history = _load_history()
     original_count = len(history.get("logs", []))
     history["logs"] = [
         l for l in history.get("logs", [])
         if l.get("roster_id") != roster_id and l.get("id") != roster_id
     ]
     removed_count = original_count - len(history["logs"])
-    _save_json(SHIFT_HISTORY_FILE, history)
+    _save_history(history)
 
     return f"Deleted roster '{roster_id}' (status: {status}).\n   Removed {removed_count} history entry(ies)."
 
@@ -1604,7 +1678,7 @@ def compare_rosters(roster_id_1: str, roster_id_2: str) -> str:
                 roster2 = _load_json(roster_file)
         else:
             # Check history
-            history = _load_json(SHIFT_HISTORY_FILE)
+            history = _load_history()
             for log in history.get("logs", []):
                 if log.get("roster_id") == rid:
                     if roster_var == "roster1":
@@ -1672,7 +1746,7 @@ def sync_history_with_files() -> str:
     Returns:
         Summary of cleanup actions taken.
     """
-    history = _load_json(SHIFT_HISTORY_FILE)
+    history = _load_history()
     original_count = len(history.get("logs", []))
     removed = []
 
@@ -1688,7 +1762,7 @@ def sync_history_with_files() -> str:
             removed.append(roster_id)
 
     history["logs"] = valid_logs
-    _save_json(SHIFT_HISTORY_FILE, history)
+    _save_history(history)
 
     result = "HISTORY SYNC COMPLETE\n" + "=" * 50 + "\n\n"
     result += f"Original entries: {original_count}\n"
@@ -1714,7 +1788,7 @@ def cleanup_old_history(weeks: int = 12) -> str:
     Returns:
         Summary of cleanup actions taken.
     """
-    history = _load_json(SHIFT_HISTORY_FILE)
+    history = _load_history()
     cutoff_date = datetime.now() - timedelta(weeks=weeks)
 
     archived_count = 0
@@ -1744,7 +1818,7 @@ def cleanup_old_history(weeks: int = 12) -> str:
         history["metadata"] = {}
     history["metadata"]["last_cleanup"] = datetime.now().isoformat()
 
-    _save_json(SHIFT_HISTORY_FILE, history)
+    _save_history(history)
 
     # Recalculate nurse stats
     recalc_result = recalculate_nurse_stats(days=30)
@@ -1770,7 +1844,7 @@ def recalculate_nurse_stats(days: int = 30) -> str:
     Returns:
         Summary of recalculated stats.
     """
-    history = _load_json(SHIFT_HISTORY_FILE)
+    history = _load_history()
     stats = _load_json(NURSE_STATS_FILE)
     cutoff_date = datetime.now() - timedelta(days=days)
 
@@ -1,15 +1,26 @@
 from ortools.sat.python import cp_model
-from models.domain import Nurse, Shift, Roster, Assignment, RosterMetadata, NursePreferences, NurseHistory
-from datetime import datetime, timedelta
-from collections import defaultdict
-from copy import deepcopy
+from models.domain import Nurse, Shift, Roster, Assignment, RosterMetadata, NursePreferences, NurseHistory, CERT_BITS
+from datetime import date, datetime, timedelta
+from collections import OrderedDict, defaultdict
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+import itertools
 import json
+import os
 import random
+import secrets
+import tempfile
 import logging
 
 # Configure logger for solver debugging
 logger = logging.getLogger(__name__)
 
+# Auto-save locations (see _auto_save_roster)
+DATA_DIR = os.path.join(os.path.dirname(__file__), "../data")
+ROSTERS_DIR = os.path.join(DATA_DIR, "rosters")
+SHIFT_HISTORY_LOG = os.path.join(DATA_DIR, "shift_history.jsonl")
+os.makedirs(ROSTERS_DIR, exist_ok=True)
+
 # =============================================================================
 # CONSTANTS
 # =============================================================================
@@ -24,10 +35,19 @@ MAX_HOURS_BY_CONTRACT = {
     "Casual": 20
 }
 
+# Certifications a nurse needs per ward, as CERT_BITS masks
+WARD_REQUIRED_CERTS = {
+    "ICU": CERT_BITS["ICU"],
+    "Emergency": CERT_BITS["ACLS"] | CERT_BITS["BLS"]
+}
+
 # Scheduling constraints
 MAX_CONSECUTIVE_SHIFTS = 3
 MIN_REST_HOURS = 8
 
+# Below this capacity ratio, an early-exit analysis reports only the understaffing
+EARLY_EXIT_CAPACITY_RATIO = 0.5
+
 # Fatigue thresholds
 FATIGUE_HIGH_THRESHOLD = 0.8
 FATIGUE_MODERATE_THRESHOLD = 0.5
@@ -44,16 +64,30 @@ WEIGHT_FATIGUE_MODERATE_PENALTY = -25
 WEIGHT_FATIGUE_WEEKEND_PENALTY = -30
 WEIGHT_FATIGUE_NIGHT_PENALTY = -30
 WEIGHT_AVOID_NIGHT_PENALTY = -50
-WEIGHT_EXCESS_SHIFTS_PENALTY = -10
-WEIGHT_DEFICIT_SHIFTS_PENALTY = -15
+WEIGHT_LOAD_SPREAD_PENALTY = -20
 WEIGHT_WEEKEND_EXCESS_PENALTY = -30
 WEIGHT_NIGHT_EXCESS_PENALTY = -30
 
+# Recent simulate_staffing_change baseline analyses, most recently used last
+ANALYSIS_CACHE_SIZE = 32
+_analysis_cache = OrderedDict()
+
+# Roster ID suffixes - a counter cannot repeat within a process; a random part
+# keeps IDs from separate processes (or a restart) within one second apart
+_ROSTER_SEQUENCE = itertools.count(1)
+
 
 # =============================================================================
 # HELPER FUNCTIONS
 # =============================================================================
 
+@lru_cache(maxsize=None)
+def _clock_offset(clock: str) -> timedelta:
+    """Offset from midnight for an HH:MM time (shift templates use only a few distinct times)."""
+    hours, minutes = clock.split(":")
+    return timedelta(hours=int(hours), minutes=int(minutes))
+
+
 def _convert_raw_shifts_to_objects(raw_shifts: list) -> list:
     """
     Convert raw shift dictionaries to Shift objects.
@@ -65,17 +99,16 @@ def _convert_raw_shifts_to_objects(raw_shifts: list) -> list:
         List of Shift objects
     """
     shifts_objs = []
+    parsed_dates = {}  # Every shift on a day shares one parsed date
     for s in raw_shifts:
-        date = datetime.strptime(s["date"], "%Y-%m-%d")
-        start_hour, start_min = map(int, s["start"].split(":"))
-        end_hour, end_min = map(int, s["end"].split(":"))
-
-        start_time = date.replace(hour=start_hour, minute=start_min)
-        if end_hour < start_hour:
+        date = parsed_dates.get(s["date"])
+        if date is None:
+            date = parsed_dates[s["date"]] = datetime.fromisoformat(s["date"])
+        start_time = date + _clock_offset(s["start"])
+        end_time = date + _clock_offset(s["end"])
+        if end_time < start_time:
             # Overnight shift
-            end_time = (date + timedelta(days=1)).replace(hour=end_hour, minute=end_min)
-        else:
-            end_time = date.replace(hour=end_hour, minute=end_min)
+            end_time += timedelta(days=1)
 
         shifts_objs.append(Shift(
             id=s["id"],
@@ -90,74 +123,88 @@ def _convert_raw_shifts_to_objects(raw_shifts: list) -> list:
 
 def _is_night_shift(shift) -> bool:
     """Check if a shift is a night shift (starts at 20:00+ or before 06:00)."""
-    return shift.start_time.hour >= 20 or shift.start_time.hour < 6
+    return shift.is_night
 
 
 def _generate_roster_id() -> str:
-    """Generate a unique roster ID with timestamp and random suffix."""
-    return f"roster_{datetime.now().strftime('%Y%m%d%H%M%S')}_{random.randint(1000, 9999)}"
+    """Generate a unique roster ID with timestamp, per-process sequence and random suffix."""
+    return f"roster_{datetime.now().strftime('%Y%m%d%H%M%S')}_{next(_ROSTER_SEQUENCE):04d}{secrets.token_hex(2)}"
+
 
+def _write_atomic(path: str, content: str) -> None:
+    """
+    Write to a temp file and rename it over path so readers never see a partial file.
 
-def _auto_save_roster(roster_id: str, roster_dict: dict, shifts_objs: list) -> None:
+    The temp file gets a unique name in the same directory, so concurrent writers of
+    the same path do not share it; it is removed if the write fails.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path),
+                                    prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _auto_save_roster(roster_id: str, roster_dict: dict, shifts_objs: list) -> str:
     """
     Automatically save roster to disk when generated.
     This ensures the roster file exists even if the LLM doesn't call save_draft_roster().
-    Also adds an entry to shift_history.json so finalize_roster() can update it.
-    """
-    import os
+    Also logs an entry to the shift history so finalize_roster() can update it.
 
-    ROSTERS_DIR = os.path.join(os.path.dirname(__file__), "../data/rosters")
-    SHIFT_HISTORY_FILE = os.path.join(os.path.dirname(__file__), "../data/shift_history.json")
+    Returns:
+        The roster serialized as compact JSON, for the tool result.
+    """
+    now = datetime.now()
 
     # Calculate period from shifts
     if shifts_objs:
-        dates = [s.start_time.strftime("%Y-%m-%d") for s in shifts_objs]
+        start_times = [s.start_time for s in shifts_objs]
         roster_dict["period"] = {
-            "start": min(dates),
-            "end": max(dates)
+            "start": min(start_times).strftime("%Y-%m-%d"),
+            "end": max(start_times).strftime("%Y-%m-%d")
         }
 
     # Set status
     roster_dict["status"] = "draft"
-    roster_dict["generated_at"] = datetime.now().isoformat()
+    roster_dict["generated_at"] = now.isoformat()
+
+    # Compact for the tool result; the roster file stays indented for people to read
+    payload = json.dumps(roster_dict, default=str)
 
     # Save to file
     roster_file = os.path.join(ROSTERS_DIR, f"{roster_id}.json")
     try:
-        with open(roster_file, "w") as f:
-            json.dump(roster_dict, f, indent=2, default=str)
+        _write_atomic(roster_file, json.dumps(roster_dict, default=str, indent=2))
         logger.info(f"Roster auto-saved to {roster_file}")
     except Exception as e:
         logger.error(f"Failed to auto-save roster: {e}")
-        return
+        return payload
 
-    # Also add to shift_history.json so finalize_roster() can update it
+    # Also log to shift history so finalize_roster() can update it. The entry is
+    # appended as one line to shift_history.jsonl rather than rewriting the whole
+    # history; history_tools folds logged entries into shift_history.json on load
+    # (later entries replace earlier ones with the same ID).
     try:
-        # Load existing history
-        if os.path.exists(SHIFT_HISTORY_FILE):
-            with open(SHIFT_HISTORY_FILE, "r") as f:
-                history = json.load(f)
-        else:
-            history = {"logs": [], "metadata": {"created_at": datetime.now().isoformat()}}
-
-        if "logs" not in history:
-            history["logs"] = []
-
-        # Create history entry
-        history_entry = roster_dict.copy()
-        history_entry["roster_id"] = roster_id
-
-        # Remove existing entry with same ID (if regenerating)
-        history["logs"] = [l for l in history["logs"] if l.get("roster_id") != roster_id and l.get("id") != roster_id]
-        history["logs"].append(history_entry)
+        # The history entry is the roster itself plus its roster_id; tag it only
+        # while serializing instead of copying the whole dict
+        roster_dict["roster_id"] = roster_id
+        try:
+            history_entry = json.dumps(roster_dict, default=str)
+        finally:
+            roster_dict.pop("roster_id", None)
 
-        # Save history
-        with open(SHIFT_HISTORY_FILE, "w") as f:
-            json.dump(history, f, indent=2, default=str)
-        logger.info(f"Roster added to shift_history.json: {roster_id}")
+        with open(SHIFT_HISTORY_LOG, "a") as f:
+            f.write(history_entry + "\n")
+        logger.info(f"Roster added to shift history log: {roster_id}")
     except Exception as e:
         logger.error(f"Failed to add roster to shift_history: {e}")
 
+    return payload
+
 
 def generate_roster(start_date: str = "", num_days: int = 7, constraints_json: str = "{}") -> str:
     """
@@ -185,12 +232,12 @@ def generate_roster(start_date: str = "", num_days: int = 7, constraints_json: s
     # Parse start date - use next unscheduled date if not provided
     if start_date:
         try:
-            parsed_date = datetime.strptime(start_date, "%Y-%m-%d")
+            parsed_date = datetime.fromisoformat(start_date)
         except ValueError:
             return json.dumps({"error": f"Invalid date format '{start_date}'. Use YYYY-MM-DD."})
     else:
         next_date = get_next_unscheduled_date()
-        parsed_date = datetime.strptime(next_date, "%Y-%m-%d")
+        parsed_date = datetime.fromisoformat(next_date)
 
     # Check for overlap with existing rosters
     overlap_info = check_period_overlap(parsed_date.strftime("%Y-%m-%d"), num_days)
@@ -235,15 +282,41 @@ def generate_roster(start_date: str = "", num_days: int = 7, constraints_json: s
 
 
 def _get_shift_duration_hours(shift) -> float:
-    """Calculate shift duration in hours."""
-    duration = shift.end_time - shift.start_time
-    # Handle overnight shifts
-    if duration.total_seconds() < 0:
-        duration = duration + timedelta(days=1)
-    return duration.total_seconds() / 3600
+    """Calculate shift duration in hours (cached on the Shift)."""
+    return shift.duration_hours
+
 
+def _parse_time_off_request(request: str):
+    """
+    Parse an adhoc request of the form "Off_YYYY-MM-DD_Reason_XXX".
 
-def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: dict) -> dict:
+    Returns (date string, date, reason), or None if it is not a time-off request.
+    Raises ValueError if the date is not a valid ISO date.
+    """
+    if not request.startswith("Off_"):
+        return None
+    parts = request.split("_", 3)
+    off_date_str = parts[1]
+    reason = parts[3] if len(parts) >= 4 else "Unspecified"
+    return off_date_str, date.fromisoformat(off_date_str), reason
+
+
+def _effective_capacity_hours(max_hours: float, fatigue: float) -> float:
+    """Reduce a nurse's contract hours according to their fatigue score."""
+    if fatigue >= FATIGUE_HIGH_THRESHOLD:
+        return max_hours * FATIGUE_HIGH_CAPACITY_FACTOR
+    if fatigue >= FATIGUE_MODERATE_THRESHOLD:
+        return max_hours * FATIGUE_MODERATE_CAPACITY_FACTOR
+    return max_hours
+
+
+def _capacity_shortfall(required_hours: float, available_hours: float) -> float:
+    """Hours of demand that the available capacity cannot cover (0 if covered)."""
+    return max(0.0, required_hours - available_hours)
+
+
+def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: dict,
+                           early_exit: bool = False) -> dict:
     """
     Analyzes why the roster cannot be generated and provides solutions.
 
@@ -252,6 +325,9 @@ def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: di
     - Certification gaps
     - Seniority gaps
     - Recommendations
+
+    With early_exit, a roster with less than EARLY_EXIT_CAPACITY_RATIO of the
+    needed capacity is reported as understaffed without the remaining sections.
     """
     report = {
         "summary": "",
@@ -280,21 +356,53 @@ def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: di
     # 1. CAPACITY ANALYSIS
     # =========================================================================
     total_shifts = len(shifts_objs)
-    total_shift_hours = sum(_get_shift_duration_hours(s) for s in shifts_objs)
 
-    # Calculate available nurse capacity
+    # Group shifts once; every section below reads these instead of re-scanning
+    total_shift_hours = 0
+    cert_hours = defaultdict(float)
+    level_hours = defaultdict(float)
+    hours_by_ward = defaultdict(float)
+    shifts_by_ward = defaultdict(list)
+    shifts_per_day = defaultdict(list)
+    night_shift_count = 0
+    for s in shifts_objs:
+        hours = s.duration_hours
+        total_shift_hours += hours
+        for cert in s.required_certifications:
+            cert_hours[cert] += hours
+        level_hours[s.min_level] += hours
+        hours_by_ward[s.ward] += hours
+        shifts_by_ward[s.ward].append(s)
+        shifts_per_day[s.start_time.toordinal()].append(s)  # Keyed by day ordinal
+        if s.is_night:
+            night_shift_count += 1
+    # Levels and wards the gap sections (3 and 4) will check
+    gap_levels = [(level, SENIORITY_ORDER.get(level, 0)) for level in ["Senior", "Mid"] if level in level_hours]
+    # Section 4 counts anyone towards wards without specific requirements, while
+    # section 6d counts nurses who can be rostered there (General needs BLS)
+    gap_wards = [
+        (ward, WARD_REQUIRED_CERTS.get(ward, 0), WARD_REQUIRED_CERTS.get(ward, CERT_BITS["BLS"]))
+        for ward in hours_by_ward
+    ]
+
+    # Calculate available nurse capacity. The same pass accumulates the supply
+    # side of sections 2-4 (capacity and nurses per cert, level and ward) and
+    # the qualified-nurse counts for section 6d.
+    # Capacities start at int 0, like sum(), so whole-hour totals stay ints.
     total_nurse_capacity_hours = 0
     nurse_capacity = {}
+    nurses_by_cert = defaultdict(list)
+    cert_capacity = defaultdict(int)
+    nurses_by_level = defaultdict(list)
+    level_capacity = defaultdict(int)
+    nurses_by_ward = defaultdict(list)
+    ward_capacity = defaultdict(int)
+    ward_qualified_counts = defaultdict(int)
+    night_avoider_count = 0
     for n in nurses_objs:
         max_hours = MAX_HOURS_BY_CONTRACT.get(n.contract_type, 40)
         fatigue = nurse_stats.get(n.id, {}).get("fatigue_score", 0)
-        # Reduce capacity for fatigued nurses
-        if fatigue >= FATIGUE_HIGH_THRESHOLD:
-            effective_hours = max_hours * FATIGUE_HIGH_CAPACITY_FACTOR
-        elif fatigue >= FATIGUE_MODERATE_THRESHOLD:
-            effective_hours = max_hours * FATIGUE_MODERATE_CAPACITY_FACTOR
-        else:
-            effective_hours = max_hours
+        effective_hours = _effective_capacity_hours(max_hours, fatigue)
         nurse_capacity[n.id] = {
             "name": n.name,
             "max_hours": max_hours,
@@ -302,6 +410,25 @@ def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: di
             "fatigue": fatigue
         }
         total_nurse_capacity_hours += effective_hours
+        if n.preferences and n.preferences.avoid_night_shifts:
+            night_avoider_count += 1
+
+        for cert in n.certifications:
+            nurses_by_cert[cert].append(n)
+            cert_capacity[cert] += effective_hours
+
+        rank = SENIORITY_ORDER.get(n.seniority_level, 0)
+        for level, level_rank in gap_levels:
+            if rank >= level_rank:
+                nurses_by_level[level].append(n)
+                level_capacity[level] += effective_hours
+
+        for ward, required, rostering_required in gap_wards:
+            if (n.cert_mask & required) == required:
+                nurses_by_ward[ward].append(n)
+                ward_capacity[ward] += effective_hours
+            if (n.cert_mask & rostering_required) == rostering_required:
+                ward_qualified_counts[ward] += 1
 
     capacity_ratio = total_nurse_capacity_hours / total_shift_hours if total_shift_hours > 0 else 0
 
@@ -324,38 +451,32 @@ def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: di
             "message": f"Need {round(shortage, 1)} more hours of capacity. Consider hiring {round(additional_fte_needed, 1)} additional FTE nurses."
         })
 
+    if early_exit and capacity_ratio < EARLY_EXIT_CAPACITY_RATIO:
+        # Understaffing dominates; the gap and conflict sections would not change the outcome
+        report["summary"] = "Roster generation failed due to: understaffing."
+        return report
+
     # =========================================================================
     # 2. CERTIFICATION GAP ANALYSIS
     # =========================================================================
-    shifts_by_cert = defaultdict(list)
-    for s in shifts_objs:
-        for cert in s.required_certifications:
-            shifts_by_cert[cert].append(s)
-
-    nurses_by_cert = defaultdict(list)
-    for n in nurses_objs:
-        for cert in n.certifications:
-            nurses_by_cert[cert].append(n)
-
-    for cert, cert_shifts in shifts_by_cert.items():
+    for cert, cert_shift_hours in cert_hours.items():
         qualified_nurses = nurses_by_cert.get(cert, [])
-        cert_shift_hours = sum(_get_shift_duration_hours(s) for s in cert_shifts)
-
-        qualified_capacity = sum(nurse_capacity[n.id]["effective_hours"] for n in qualified_nurses)
+        qualified_capacity = cert_capacity.get(cert, 0)
 
-        if qualified_capacity < cert_shift_hours:
+        shortage = _capacity_shortfall(cert_shift_hours, qualified_capacity)
+        if shortage > 0:
             gap = {
                 "certification": cert,
                 "required_hours": round(cert_shift_hours, 1),
                 "available_hours": round(qualified_capacity, 1),
                 "qualified_nurses": [n.name for n in qualified_nurses],
-                "shortage_hours": round(cert_shift_hours - qualified_capacity, 1)
+                "shortage_hours": round(shortage, 1)
             }
             report["certification_gaps"].append(gap)
             report["recommendations"].append({
                 "issue": f"CERTIFICATION_GAP_{cert}",
                 "severity": "HIGH",
-                "message": f"Need {round(cert_shift_hours - qualified_capacity, 1)} more hours of {cert}-certified nurses. "
+                "message": f"Need {round(shortage, 1)} more hours of {cert}-certified nurses. "
                           f"Qualified: {', '.join([n.name for n in qualified_nurses]) or 'None'}. "
                           f"Solution: Train existing staff or hire {cert}-certified nurses."
             })
@@ -364,69 +485,47 @@ def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: di
     # 3. SENIORITY GAP ANALYSIS
     # =========================================================================
 
-    shifts_by_level = defaultdict(list)
-    for s in shifts_objs:
-        shifts_by_level[s.min_level].append(s)
+    for level, _ in gap_levels:
+        level_shift_hours = level_hours[level]
 
-    for level in ["Senior", "Mid"]:
-        level_shifts = shifts_by_level.get(level, [])
-        if not level_shifts:
-            continue
+        # Nurses who can cover this level
+        eligible_nurses = nurses_by_level.get(level, [])
+        eligible_capacity = level_capacity.get(level, 0)
 
-        level_shift_hours = sum(_get_shift_duration_hours(s) for s in level_shifts)
-
-        # Find nurses who can cover this level
-        eligible_nurses = [n for n in nurses_objs
-                          if SENIORITY_ORDER.get(n.seniority_level, 0) >= SENIORITY_ORDER.get(level, 0)]
-
-        eligible_capacity = sum(nurse_capacity[n.id]["effective_hours"] for n in eligible_nurses)
-
-        if eligible_capacity < level_shift_hours:
+        shortage = _capacity_shortfall(level_shift_hours, eligible_capacity)
+        if shortage > 0:
             gap = {
                 "required_level": level,
                 "required_hours": round(level_shift_hours, 1),
                 "available_hours": round(eligible_capacity, 1),
                 "eligible_nurses": [n.name for n in eligible_nurses],
-                "shortage_hours": round(level_shift_hours - eligible_capacity, 1)
+                "shortage_hours": round(shortage, 1)
             }
             report["seniority_gaps"].append(gap)
             report["recommendations"].append({
                 "issue": f"SENIORITY_GAP_{level}",
                 "severity": "HIGH",
-                "message": f"Need {round(level_shift_hours - eligible_capacity, 1)} more hours of {level}+ nurses. "
+                "message": f"Need {round(shortage, 1)} more hours of {level}+ nurses. "
                           f"Solution: Promote staff or hire experienced nurses."
             })
 
     # =========================================================================
     # 4. WARD-SPECIFIC ANALYSIS
     # =========================================================================
-    shifts_by_ward = defaultdict(list)
-    for s in shifts_objs:
-        shifts_by_ward[s.ward].append(s)
-
-    for ward, ward_shifts in shifts_by_ward.items():
-        ward_hours = sum(_get_shift_duration_hours(s) for s in ward_shifts)
+    for ward, ward_hours in hours_by_ward.items():
 
-        # Find nurses qualified for this ward
-        qualified = []
-        for n in nurses_objs:
-            can_work = True
-            if ward == "ICU" and "ICU" not in n.certifications:
-                can_work = False
-            elif ward == "Emergency" and ("ACLS" not in n.certifications or "BLS" not in n.certifications):
-                can_work = False
-            if can_work:
-                qualified.append(n)
+        # Nurses qualified for this ward
+        qualified = nurses_by_ward.get(ward, [])
+        qualified_capacity = ward_capacity.get(ward, 0)
 
-        qualified_capacity = sum(nurse_capacity[n.id]["effective_hours"] for n in qualified)
-
-        if qualified_capacity < ward_hours:
+        shortage = _capacity_shortfall(ward_hours, qualified_capacity)
+        if shortage > 0:
             gap = {
                 "ward": ward,
                 "required_hours": round(ward_hours, 1),
                 "available_hours": round(qualified_capacity, 1),
                 "qualified_nurses": [n.name for n in qualified],
-                "shortage_hours": round(ward_hours - qualified_capacity, 1)
+                "shortage_hours": round(shortage, 1)
             }
             report["ward_gaps"].append(gap)
             report["recommendations"].append({
@@ -439,21 +538,25 @@ def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: di
     # =========================================================================
     # 5. FATIGUED NURSES ANALYSIS
     # =========================================================================
+    high_reduction = f"{int((1 - FATIGUE_HIGH_CAPACITY_FACTOR) * 100)}%"
+    moderate_reduction = f"{int((1 - FATIGUE_MODERATE_CAPACITY_FACTOR) * 100)}%"
     fatigued_nurses = []
     for n in nurses_objs:
-        fatigue = nurse_stats.get(n.id, {}).get("fatigue_score", 0)
+        # Fatigue was already looked up for the capacity analysis
+        fatigue = nurse_capacity[n.id]["fatigue"]
         if fatigue >= FATIGUE_MODERATE_THRESHOLD:
+            is_high = fatigue >= FATIGUE_HIGH_THRESHOLD
             fatigued_nurses.append({
                 "nurse": n.name,
                 "nurse_id": n.id,
                 "fatigue_score": round(fatigue, 2),
-                "status": "HIGH RISK" if fatigue >= FATIGUE_HIGH_THRESHOLD else "MODERATE",
-                "capacity_reduction": f"{int((1 - FATIGUE_HIGH_CAPACITY_FACTOR) * 100)}%" if fatigue >= FATIGUE_HIGH_THRESHOLD else f"{int((1 - FATIGUE_MODERATE_CAPACITY_FACTOR) * 100)}%"
+                "status": "HIGH RISK" if is_high else "MODERATE",
+                "capacity_reduction": high_reduction if is_high else moderate_reduction
             })
 
     if fatigued_nurses:
         report["availability_issues"] = fatigued_nurses
-        high_fatigue_count = len([f for f in fatigued_nurses if f["status"] == "HIGH RISK"])
+        high_fatigue_count = sum(1 for f in fatigued_nurses if f["status"] == "HIGH RISK")
         report["recommendations"].append({
             "issue": "FATIGUE",
             "severity": "MEDIUM" if high_fatigue_count == 0 else "HIGH",
@@ -465,28 +568,25 @@ def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: di
     # 5b. TIME-OFF REQUESTS ANALYSIS
     # =========================================================================
     time_off_entries = []
-    scheduling_dates = set(s.start_time.date() for s in shifts_objs)
+    scheduling_days = shifts_per_day.keys()  # Day ordinals
 
     for n in nurses_objs:
         if n.preferences and n.preferences.adhoc_requests:
             for request in n.preferences.adhoc_requests:
-                if request.startswith("Off_"):
-                    parts = request.split("_")
-                    if len(parts) >= 2:
-                        try:
-                            off_date_str = parts[1]
-                            off_date = datetime.strptime(off_date_str, "%Y-%m-%d").date()
-                            reason = parts[3] if len(parts) >= 4 else "Unspecified"
-                            # Only include if date falls within scheduling period
-                            if off_date in scheduling_dates:
-                                time_off_entries.append({
-                                    "nurse": n.name,
-                                    "nurse_id": n.id,
-                                    "date": off_date_str,
-                                    "reason": reason
-                                })
-                        except ValueError:
-                            pass
+                try:
+                    time_off = _parse_time_off_request(request)
+                except ValueError:
+                    continue
+                if time_off:
+                    off_date_str, off_date, reason = time_off
+                    # Only include if date falls within scheduling period
+                    if off_date.toordinal() in scheduling_days:
+                        time_off_entries.append({
+                            "nurse": n.name,
+                            "nurse_id": n.id,
+                            "date": off_date_str,
+                            "reason": reason
+                        })
 
     if time_off_entries:
         report["time_off_requests"] = time_off_entries
@@ -524,18 +624,14 @@ def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: di
         # Analyze scheduling constraint conflicts
 
         # 6a. Check shifts per day vs nurses available per day
-        shifts_per_day = defaultdict(list)
-        for s in shifts_objs:
-            day_key = s.start_time.date()
-            shifts_per_day[day_key].append(s)
-
-        for day, day_shifts in shifts_per_day.items():
-            day_name = day.strftime("%A")
+        for day_ord, day_shifts in shifts_per_day.items():
             shift_count = len(day_shifts)
 
             # Each nurse can only work 1 shift per day
             # So we need at least shift_count nurses available that day
             if shift_count > len(nurses_objs):
+                day = date.fromordinal(day_ord)
+                day_name = day.strftime("%A")
                 constraint_issues.append({
                     "type": "DAILY_COVERAGE",
                     "severity": "HIGH",
@@ -552,9 +648,9 @@ def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: di
         # 6b. Check consecutive days constraint
         # If a nurse works 3 days in a row, they can't work day 4
         # This can cause issues if we need all nurses every day
-        sorted_dates = sorted(shifts_per_day.keys())
-        if len(sorted_dates) > 3:
-            avg_shifts_per_day = sum(len(shifts_per_day[d]) for d in sorted_dates) / len(sorted_dates)
+        num_days = len(shifts_per_day)
+        if num_days > 3:
+            avg_shifts_per_day = total_shifts / num_days
             if avg_shifts_per_day > len(nurses_objs) * 0.75:  # More than 75% utilization
                 constraint_issues.append({
                     "type": "CONSECUTIVE_SHIFT_LIMIT",
@@ -570,31 +666,40 @@ def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: di
 
         # 6c. Check rest period conflicts (8-hour minimum between shifts)
         # Night shift (ends 08:00) + Day shift (starts 08:00) = 0 hours rest = CONFLICT
-        night_to_day_conflicts = []
+        # Sweep over shifts sorted by start time so each evening/night shift only
+        # inspects the shifts starting inside its rest window
+        rest_window = timedelta(hours=MIN_REST_HOURS)
+        by_start = sorted(range(len(shifts_objs)), key=lambda idx: shifts_objs[idx].start_time)
+        start_times = [shifts_objs[idx].start_time for idx in by_start]
+        night_to_day_conflicts = []  # First few examples only
+        conflict_count = 0
         for s in shifts_objs:
             # Night shifts end in the morning
-            if s.start_time.hour == 0 or s.start_time.hour >= 16:  # Evening/night shifts
-                end_hour = s.end_time.hour
+            if s.start_hour == 0 or s.start_hour >= 16:  # Evening/night shifts
                 end_date = s.end_time.date()
 
                 # Check if there's a day shift starting within 8 hours
-                for s2 in shifts_objs:
-                    if s2.start_time.date() == end_date and s2.start_time.hour < 14:
-                        gap_hours = (s2.start_time - s.end_time).total_seconds() / 3600
-                        if 0 < gap_hours < 8:
+                lo = bisect_right(start_times, s.end_time)
+                hi = bisect_left(start_times, s.end_time + rest_window)
+                for idx in sorted(by_start[lo:hi]):
+                    s2 = shifts_objs[idx]
+                    if s2.start_time.date() == end_date and s2.start_hour < 14:
+                        conflict_count += 1
+                        if len(night_to_day_conflicts) < 3:
+                            gap_hours = (s2.start_time - s.end_time).total_seconds() / 3600
                             night_to_day_conflicts.append({
                                 "shift1": f"{s.ward} {s.start_time.strftime('%H:%M')}-{s.end_time.strftime('%H:%M')}",
                                 "shift2": f"{s2.ward} {s2.start_time.strftime('%H:%M')}-{s2.end_time.strftime('%H:%M')}",
                                 "gap_hours": round(gap_hours, 1)
                             })
 
-        if night_to_day_conflicts:
+        if conflict_count:
             constraint_issues.append({
                 "type": "REST_PERIOD_CONFLICT",
                 "severity": "HIGH",
-                "message": f"Found {len(night_to_day_conflicts)} shift pairs with less than 8-hour rest gap. "
+                "message": f"Found {conflict_count} shift pairs with less than 8-hour rest gap. "
                           f"A nurse cannot work both shifts.",
-                "examples": night_to_day_conflicts[:3],  # Show first 3
+                "examples": night_to_day_conflicts,  # Show first 3
                 "solutions": [
                     "Ensure enough nurses so different people cover consecutive tight shifts",
                     "Adjust shift start/end times to allow 8-hour gaps",
@@ -604,7 +709,7 @@ def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: di
 
         # 6d. Check if certain wards have too many shifts relative to qualified nurses
         for ward, ward_shifts in shifts_by_ward.items():
-            qualified_count = len([n for n in nurses_objs if _nurse_can_work_ward(n, ward)])
+            qualified_count = ward_qualified_counts[ward]
             shifts_per_week = len(ward_shifts)
 
             # Each qualified nurse can work ~5 shifts per week (with rest days)
@@ -625,17 +730,15 @@ def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: di
                 })
 
         # 6e. Check preference conflicts
-        nurses_avoiding_nights = [n for n in nurses_objs if n.preferences and n.preferences.avoid_night_shifts]
-        night_shifts = [s for s in shifts_objs if s.start_time.hour >= 20 or s.start_time.hour < 6]
-
-        if night_shifts:
-            nurses_for_nights = len(nurses_objs) - len(nurses_avoiding_nights)
-            if nurses_for_nights < len(night_shifts) / len(sorted_dates):
+        # Night shifts and night avoiders are counted in section 1
+        if night_shift_count:
+            nurses_for_nights = len(nurses_objs) - night_avoider_count
+            if nurses_for_nights < night_shift_count / len(shifts_per_day):
                 constraint_issues.append({
                     "type": "NIGHT_SHIFT_PREFERENCE_CONFLICT",
                     "severity": "MEDIUM",
-                    "message": f"{len(nurses_avoiding_nights)} nurses avoid night shifts, leaving {nurses_for_nights} for "
-                              f"{len(night_shifts)} night shifts over {len(sorted_dates)} days.",
+                    "message": f"{night_avoider_count} nurses avoid night shifts, leaving {nurses_for_nights} for "
+                              f"{night_shift_count} night shifts over {len(shifts_per_day)} days.",
                     "solutions": [
                         "Hire nurses willing to work night shifts",
                         "Discuss night shift requirements with nurses who prefer to avoid them",
@@ -682,14 +785,38 @@ def _analyze_infeasibility(nurses_objs: list, shifts_objs: list, nurse_stats: di
     return report
 
 
-def _nurse_can_work_ward(nurse, ward: str) -> bool:
-    """Check if a nurse is qualified to work in a ward."""
-    if ward == "ICU":
-        return "ICU" in nurse.certifications
-    elif ward == "Emergency":
-        return "ACLS" in nurse.certifications and "BLS" in nurse.certifications
-    else:  # General
-        return "BLS" in nurse.certifications
+def _analysis_key(nurses_objs: list, shifts_objs: list, nurse_stats: dict) -> tuple:
+    """Hashable snapshot of every input field _analyze_infeasibility reads."""
+    nurses_key = tuple(
+        (n.id, n.name, n.seniority_level, tuple(n.certifications), n.contract_type,
+         n.preferences.avoid_night_shifts, tuple(n.preferences.adhoc_requests))
+        for n in nurses_objs
+    )
+    shifts_key = tuple(
+        (s.id, s.ward, s.start_time, s.end_time, tuple(s.required_certifications), s.min_level)
+        for s in shifts_objs
+    )
+    stats_key = tuple(nurse_stats.get(n.id, {}).get("fatigue_score", 0) for n in nurses_objs)
+    return nurses_key, shifts_key, stats_key
+
+
+def _analyze_infeasibility_cached(nurses_objs: list, shifts_objs: list, nurse_stats: dict) -> dict:
+    """
+    _analyze_infeasibility with an LRU cache keyed on the analyzed inputs.
+
+    Repeated simulations for the same period and staff reuse the report.
+    The returned dict is shared between callers and must not be modified.
+    """
+    key = _analysis_key(nurses_objs, shifts_objs, nurse_stats)
+    report = _analysis_cache.get(key)
+    if report is None:
+        report = _analyze_infeasibility(nurses_objs, shifts_objs, nurse_stats)
+        _analysis_cache[key] = report
+        if len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+            _analysis_cache.popitem(last=False)
+    else:
+        _analysis_cache.move_to_end(key)
+    return report
 
 
 def simulate_staffing_change(
@@ -725,19 +852,19 @@ def simulate_staffing_change(
     # Determine start date
     if start_date:
         try:
-            parsed_date = datetime.strptime(start_date, "%Y-%m-%d")
+            parsed_date = datetime.fromisoformat(start_date)
         except ValueError:
             return json.dumps({"error": f"Invalid date format '{start_date}'. Use YYYY-MM-DD."})
     else:
         next_date = get_next_unscheduled_date()
-        parsed_date = datetime.strptime(next_date, "%Y-%m-%d")
+        parsed_date = datetime.fromisoformat(next_date)
 
     # Generate shifts and convert to Shift objects
     raw_shifts = gen_shifts(start_date=parsed_date, num_days=num_days)
     shifts_objs = _convert_raw_shifts_to_objects(raw_shifts)
 
-    # Get current analysis (before changes)
-    before_analysis = _analyze_infeasibility(nurses_objs, shifts_objs, nurse_stats)
+    # Get current analysis (before changes); unchanged staff and period hit the cache
+    before_analysis = _analyze_infeasibility_cached(nurses_objs, shifts_objs, nurse_stats)
 
     result = {
         "action": action,
@@ -749,9 +876,11 @@ def simulate_staffing_change(
         "recommendations": []
     }
 
-    # Create a copy of nurses for simulation
-    simulated_nurses = deepcopy(nurses_objs)
-    simulated_stats = deepcopy(nurse_stats)
+    # Shallow copy for simulation: hires are appended and a promoted nurse
+    # is replaced by a modified copy, so the originals are never mutated.
+    # Stats are only written when hiring, which copies them first.
+    simulated_nurses = list(nurses_objs)
+    simulated_stats = nurse_stats
 
     if action == "promote":
         # Promote an existing nurse
@@ -761,10 +890,10 @@ def simulate_staffing_change(
                 "example": "simulate_staffing_change(action='promote', nurse_id='nurse_002', new_level='Mid')"
             })
 
-            target_level_num = SENIORITY_ORDER.get(new_level, 0)
+        target_level_num = SENIORITY_ORDER.get(new_level, 0)
 
         promoted = False
-        for n in simulated_nurses:
+        for idx, n in enumerate(simulated_nurses):
             if n.id == nurse_id:
                 current_level_num = SENIORITY_ORDER.get(n.seniority_level, 0)
                 if target_level_num <= current_level_num:
@@ -778,7 +907,7 @@ def simulate_staffing_change(
                     "from_level": n.seniority_level,
                     "to_level": new_level
                 })
-                n.seniority_level = new_level
+                simulated_nurses[idx] = n.model_copy(update={"seniority_level": new_level})
                 promoted = True
                 break
 
@@ -860,18 +989,20 @@ def simulate_staffing_change(
         else:
             # Create simulated nurses for each gap
             hire_counter = 1
+            simulated_stats = dict(nurse_stats)  # One level is enough: entries are only added
 
             for gap in gaps_to_fill:
                 for i in range(gap["nurses_needed"]):
                     new_nurse_id = f"sim_nurse_{hire_counter:03d}"
-                    new_nurse = Nurse(
+                    # Built from trusted gap data, so skip validation
+                    new_nurse = Nurse.model_construct(
                         id=new_nurse_id,
                         name=f"New Hire {hire_counter} ({gap['ward']})",
                         seniority_level=gap["min_level"],
                         certifications=gap["certifications"],
                         contract_type="FullTime",
-                        preferences=NursePreferences(),  # Default preferences
-                        history_summary=NurseHistory()   # Fresh history (no previous shifts)
+                        preferences=NursePreferences.model_construct(),  # Default preferences
+                        history_summary=NurseHistory.model_construct()   # Fresh history (no previous shifts)
                     )
                     simulated_nurses.append(new_nurse)
                     simulated_stats[new_nurse_id] = {"fatigue_score": 0.0}  # Fresh nurse
@@ -891,7 +1022,7 @@ def simulate_staffing_change(
         return json.dumps({"error": f"Unknown action '{action}'. Use 'hire' or 'promote'."})
 
     # Re-analyze with simulated changes
-    after_analysis = _analyze_infeasibility(simulated_nurses, shifts_objs, simulated_stats)
+    after_analysis = _analyze_infeasibility(simulated_nurses, shifts_objs, simulated_stats, early_exit=True)
     result["after"] = after_analysis
 
     # Determine if simulation would succeed
@@ -914,36 +1045,29 @@ def simulate_staffing_change(
     # Generate job posting recommendations for hires
     if action == "hire" and result["simulated_changes"]:
         job_postings = []
+        seen_postings = set()
         for change in result["simulated_changes"]:
             if change["type"] == "hire":
-                posting = {
+                # Avoid duplicates: postings are fully determined by these fields
+                key = (change["seniority"], change["target_ward"], change["contract"],
+                       tuple(change["certifications"]))
+                if key in seen_postings:
+                    continue
+                seen_postings.add(key)
+                job_postings.append({
                     "title": f"{change['seniority']} Nurse - {change['target_ward']}",
                     "type": change["contract"],
                     "required_certifications": change["certifications"],
                     "seniority_level": change["seniority"]
-                }
-                # Avoid duplicates
-                if posting not in job_postings:
-                    job_postings.append(posting)
+                })
         result["recommended_job_postings"] = job_postings
 
     return json.dumps(result, default=str, indent=2)
 
 
-def _shifts_overlap_or_too_close(shift1, shift2, min_rest_hours: int = 8) -> bool:
-    """Check if two shifts are too close (less than min_rest_hours apart)."""
-    min_rest = timedelta(hours=min_rest_hours)
-
-    # Get end of first shift and start of second
-    if shift1.end_time <= shift2.start_time:
-        gap = shift2.start_time - shift1.end_time
-        return gap < min_rest
-    elif shift2.end_time <= shift1.start_time:
-        gap = shift1.start_time - shift2.end_time
-        return gap < min_rest
-    else:
-        # Shifts overlap
-        return True
+def _to_minutes(dt: datetime) -> int:
+    """Convert a naive datetime to an absolute minute count for integer arithmetic."""
+    return dt.toordinal() * 1440 + dt.hour * 60 + dt.minute
 
 
 def _solve_roster_internal(nurses_objs: list, shifts_objs: list, nurse_stats: dict) -> str:
@@ -960,188 +1084,171 @@ def _solve_roster_internal(nurses_objs: list, shifts_objs: list, nurse_stats: di
 
     model = cp_model.CpModel()
 
-    # Variables: assignments[(n, s)] is 1 if nurse n works shift s, 0 otherwise
-    assignments = {}
+    # Variables: assignments[i][j] is 1 if nurse i works shift j, 0 otherwise,
+    # indexed by position in nurses_objs / shifts_objs.
+    # Hard Constraints 2 and 3 (certification and seniority level requirements)
+    # are applied here: a variable only exists for pairs where the nurse holds
+    # every required certification and meets the minimum level. Other cells
+    # are None - a fixed 0 that is kept out of the model entirely.
+    # all_vars lists the same variables flat, as (nurse id, shift id, var).
+    num_shifts = len(shifts_objs)
+    num_nurses = len(nurses_objs)
+    # Everything the pair check needs is resolved up front, so the inner loop
+    # only does integer comparisons on locals
+    shift_requirements = [(s.cert_mask, SENIORITY_ORDER.get(s.min_level, 0), s.id) for s in shifts_objs]
+    new_bool_var = model.NewBoolVar
+    assignments = []
+    all_vars = []
     for n in nurses_objs:
-        for s in shifts_objs:
-            assignments[(n.id, s.id)] = model.NewBoolVar(f'shift_n{n.id}_s{s.id}')
-
-    # Hard Constraint 1: Each shift must be assigned to exactly one nurse
-    for s in shifts_objs:
-        model.Add(sum(assignments[(n.id, s.id)] for n in nurses_objs) == 1)
+        nurse_id = n.id
+        nurse_mask = n.cert_mask
+        nurse_level = SENIORITY_ORDER.get(n.seniority_level, 0)
+        row = [None] * num_shifts
+        for j, (required_mask, required_level, shift_id) in enumerate(shift_requirements):
+            if (nurse_mask & required_mask) == required_mask and nurse_level >= required_level:
+                var = row[j] = new_bool_var(f'shift_n{nurse_id}_s{shift_id}')
+                all_vars.append((nurse_id, shift_id, var))
+        assignments.append(row)
+
+    # Hard Constraint 7 (see below) needs an eligible Senior nurse on every
+    # shift. If some shift has none the problem is infeasible whatever else
+    # holds, so skip building and solving the model and explain why directly.
+    senior_rows = [assignments[i] for i, n in enumerate(nurses_objs) if n.seniority_level == "Senior"]
+    shifts_without_senior = [s for j, s in enumerate(shifts_objs)
+                             if all(row[j] is None for row in senior_rows)]
+    if shifts_without_senior:
+        for s in shifts_without_senior:
+            logger.warning(f"No eligible Senior nurse for shift {s.id} ({s.ward}, {s.start_time}). "
+                          f"Required certs: {s.required_certifications}, min_level: {s.min_level}")
+        logger.warning("Roster is infeasible without solving, running infeasibility analysis")
+        analysis = _analyze_infeasibility(nurses_objs, shifts_objs, nurse_stats)
+        return json.dumps({
+            "error": "No feasible solution found",
+            "analysis": analysis
+        }, default=str)
 
-    # Hard Constraint 2: Certification requirements
-    for s in shifts_objs:
-        for n in nurses_objs:
-            if s.required_certifications:
-                has_all_certs = all(cert in n.certifications for cert in s.required_certifications)
-                if not has_all_certs:
-                    model.Add(assignments[(n.id, s.id)] == 0)
+    def nurse_vars(i: int, shift_indices=None) -> list:
+        """Nurse i's assignment variables, optionally limited to some shifts."""
+        row = assignments[i]
+        if shift_indices is None:
+            return [var for var in row if var is not None]
+        return [row[j] for j in shift_indices if row[j] is not None]
 
-    # Hard Constraint 3: Seniority level requirements
-    for s in shifts_objs:
-        for n in nurses_objs:
-            nurse_level = SENIORITY_ORDER.get(n.seniority_level, 0)
-            required_level = SENIORITY_ORDER.get(s.min_level, 0)
-            if nurse_level < required_level:
-                model.Add(assignments[(n.id, s.id)] == 0)
+    # Hard Constraint 1: Each shift must be assigned to exactly one nurse
+    for j in range(num_shifts):
+        model.Add(sum(row[j] for row in assignments if row[j] is not None) == 1)
 
     # Hard Constraint 4: Maximum weekly hours per contract type
-    for n in nurses_objs:
+    shift_hours = [int(_get_shift_duration_hours(s)) for s in shifts_objs]
+    for i, n in enumerate(nurses_objs):
         max_hours = MAX_HOURS_BY_CONTRACT.get(n.contract_type, 40)
         # Calculate total hours for this nurse
         # Each shift duration in hours, multiplied by assignment variable
         total_hours_terms = []
-        for s in shifts_objs:
-            shift_hours = int(_get_shift_duration_hours(s))
-            total_hours_terms.append(shift_hours * assignments[(n.id, s.id)])
+        for hours, var in zip(shift_hours, assignments[i]):
+            if var is not None:
+                total_hours_terms.append(hours * var)
         model.Add(sum(total_hours_terms) <= max_hours)
 
     # Hard Constraint: Fair distribution (Min/Max shifts per nurse)
     # OR-Tools best practice: Ensure every nurse gets a fair share of shifts
     # NOTE: Relaxed to allow for Senior coverage requirements (Seniors may need to work more)
-    num_shifts = len(shifts_objs)
-    num_nurses = len(nurses_objs)
     if num_nurses > 0:
         avg_shifts = num_shifts / num_nurses
         # Allow a wider window. Min is average - 2 (can be 0), Max is handled by MAX_HOURS
         # We allow 0 because strict senior coverage might require Seniors to take most shifts
         min_shifts_per_nurse = max(0, int(avg_shifts) - 2)
-        
-        for n in nurses_objs:
-            shifts_worked = []
-            for s in shifts_objs:
-                shifts_worked.append(assignments[(n.id, s.id)])
-            
-            model.Add(sum(shifts_worked) >= min_shifts_per_nurse)
+
+        for i in range(num_nurses):
+            model.Add(sum(nurse_vars(i)) >= min_shifts_per_nurse)
             # Upper bound is already handled by MAX_HOURS (Constraint 4)
 
     # Hard Constraint 5: Minimum rest period between shifts (8 hours)
-    # OPTIMIZED: Only check shift pairs that could potentially conflict
-    # Two shifts can only conflict if they're within 24 hours of each other
-    # This reduces O(N × S²) to O(N × K) where K is the number of conflicting pairs
-
-    # Pre-compute conflicting shift pairs (done once, not per nurse)
-    # Sort shifts by start time for efficient neighbor lookup
-    sorted_shifts = sorted(shifts_objs, key=lambda s: s.start_time)
-    conflicting_pairs = []
-
-    for i, s1 in enumerate(sorted_shifts):
-        # Only check subsequent shifts within 24 hours
-        for j in range(i + 1, len(sorted_shifts)):
-            s2 = sorted_shifts[j]
-            # If s2 starts more than 24 hours after s1 ends, no more conflicts possible
-            if s2.start_time > s1.end_time + timedelta(hours=24):
-                break
-            if _shifts_overlap_or_too_close(s1, s2, MIN_REST_HOURS):
-                conflicting_pairs.append((s1.id, s2.id))
-
-    logger.debug(f"Found {len(conflicting_pairs)} conflicting shift pairs (out of {len(shifts_objs) * (len(shifts_objs)-1) // 2} total pairs)")
+    # Each eligible shift becomes an optional interval that runs from the shift
+    # start to the end of the rest period after it, present only if the nurse
+    # works the shift. Two shifts conflict exactly when they overlap or leave
+    # less than the minimum rest between them, i.e. when their intervals
+    # overlap, so one NoOverlap per nurse replaces pairwise AtMostOne
+    # constraints and propagates more strongly. Times are in integer minutes.
+    rest = MIN_REST_HOURS * 60
+    shift_windows = []
+    for s in shifts_objs:
+        start = _to_minutes(s.start_time)
+        shift_windows.append((start, _to_minutes(s.end_time) - start + rest, s.id))
 
-    # Apply conflict constraints for each nurse - now O(N × K) instead of O(N × S²)
-    for n in nurses_objs:
-        for s1_id, s2_id in conflicting_pairs:
-            model.AddAtMostOne([assignments[(n.id, s1_id)], assignments[(n.id, s2_id)]])
+    for n, row in zip(nurses_objs, assignments):
+        eligible = [(window, var) for window, var in zip(shift_windows, row) if var is not None]
+        if len(eligible) < 2:
+            continue
+        model.AddNoOverlap([
+            model.NewOptionalFixedSizeIntervalVar(start, size, var, f'rest_n{n.id}_s{shift_id}')
+            for (start, size, shift_id), var in eligible
+        ])
 
     # Hard Constraint 6: Maximum consecutive shifts (3)
     # Group shifts by date to check consecutive working days/shifts
-    shifts_by_date = {}
-    for s in shifts_objs:
-        date_key = s.start_time.date()
-        if date_key not in shifts_by_date:
-            shifts_by_date[date_key] = []
-        shifts_by_date[date_key].append(s)
+    shifts_by_date = defaultdict(list)
+    for j, s in enumerate(shifts_objs):
+        shifts_by_date[s.start_time.date()].append(j)
 
     sorted_dates = sorted(shifts_by_date.keys())
 
     # For any window of MAX_CONSECUTIVE_SHIFTS + 1 consecutive dates,
     # nurse can work at most MAX_CONSECUTIVE_SHIFTS
     # This covers both "4 days in a row" and "4 shifts in 2 days" violations
-    for n in nurses_objs:
-        for i in range(len(sorted_dates) - MAX_CONSECUTIVE_SHIFTS):
-            window_dates = sorted_dates[i : i + MAX_CONSECUTIVE_SHIFTS + 1]
-            
-            # Check if these are actually consecutive dates
-            is_consecutive_days = True
-            for j in range(len(window_dates) - 1):
-                if (window_dates[j+1] - window_dates[j]).days > 1:
-                    is_consecutive_days = False
-                    break
-            
-            if is_consecutive_days:
-                # Sum of shifts worked in this window must be <= MAX_CONSECUTIVE_SHIFTS
-                window_assignments = []
-                for date in window_dates:
-                    for s in shifts_by_date[date]:
-                        window_assignments.append(assignments[(n.id, s.id)])
-                
-                if window_assignments:
-                    model.Add(sum(window_assignments) <= MAX_CONSECUTIVE_SHIFTS)
-
-    # Hard Constraint 7: At least one Senior nurse must be on duty for EVERY shift
-    # Rule: "At least one Senior nurse must be on duty for every shift"
-    # This means EACH individual shift must have a Senior nurse assigned to it.
-    senior_nurses = [n for n in nurses_objs if n.seniority_level == "Senior"]
+    # The windows do not depend on the nurse, so build them once
+    consecutive_windows = []
+    for d in range(len(sorted_dates) - MAX_CONSECUTIVE_SHIFTS):
+        window_dates = sorted_dates[d : d + MAX_CONSECUTIVE_SHIFTS + 1]
+
+        # Check if these are actually consecutive dates
+        is_consecutive_days = all(
+            (window_dates[k+1] - window_dates[k]).days <= 1 for k in range(len(window_dates) - 1)
+        )
 
-    for s in shifts_objs:
-        # Find all Senior nurses who are eligible for this shift
-        eligible_senior_assignments = []
-        for n in senior_nurses:
-            # Check certification eligibility
-            if s.required_certifications:
-                has_certs = all(cert in n.certifications for cert in s.required_certifications)
-                if not has_certs:
-                    continue
+        if is_consecutive_days:
+            consecutive_windows.append([j for date in window_dates for j in shifts_by_date[date]])
 
-            # Check seniority level eligibility (Senior >= any min_level)
-            nurse_level = SENIORITY_ORDER.get(n.seniority_level, 0)
-            required_level = SENIORITY_ORDER.get(s.min_level, 0)
-            if nurse_level < required_level:
-                continue
+    for i in range(num_nurses):
+        for window in consecutive_windows:
+            # Sum of shifts worked in this window must be <= MAX_CONSECUTIVE_SHIFTS
+            window_assignments = nurse_vars(i, window)
 
-            eligible_senior_assignments.append(assignments[(n.id, s.id)])
+            if window_assignments:
+                model.Add(sum(window_assignments) <= MAX_CONSECUTIVE_SHIFTS)
 
-        # Each shift must have at least one Senior nurse
-        if eligible_senior_assignments:
-            model.Add(sum(eligible_senior_assignments) >= 1)
-        else:
-            # No eligible Senior nurse for this shift - this will make the problem infeasible
-            # Log the issue for debugging - the infeasibility analysis will explain why
-            logger.warning(f"No eligible Senior nurse for shift {s.id} ({s.ward}, {s.start_time}). "
-                          f"Required certs: {s.required_certifications}, min_level: {s.min_level}")
-            # Force infeasibility by requiring at least 1 from an empty set
-            # This ensures the solver fails and triggers proper analysis
-            model.Add(sum([]) >= 1)
+    # Hard Constraint 7: At least one Senior nurse must be on duty for EVERY shift
+    # Rule: "At least one Senior nurse must be on duty for every shift"
+    # This means EACH individual shift must have a Senior nurse assigned to it.
+    # Every shift has at least one eligible Senior (checked after variable creation).
+    for j in range(num_shifts):
+        model.Add(sum(row[j] for row in senior_rows if row[j] is not None) >= 1)
 
     # Hard Constraint 8: Honor adhoc time-off requests (high priority)
     time_off_blocked = []  # Track for logging
-    for n in nurses_objs:
+    for i, n in enumerate(nurses_objs):
         if n.preferences and n.preferences.adhoc_requests:
             for request in n.preferences.adhoc_requests:
-                # Parse adhoc request format: "Off_YYYY-MM-DD_Reason_XXX"
-                if request.startswith("Off_"):
-                    parts = request.split("_")
-                    if len(parts) >= 2:
-                        try:
-                            off_date_str = parts[1]
-                            off_date = datetime.strptime(off_date_str, "%Y-%m-%d").date()
-                            reason = parts[3] if len(parts) >= 4 else "Unspecified"
-                            # Block all shifts on this date for this nurse
-                            shifts_blocked = 0
-                            for s in shifts_objs:
-                                if s.start_time.date() == off_date:
-                                    model.Add(assignments[(n.id, s.id)] == 0)
-                                    shifts_blocked += 1
-                            if shifts_blocked > 0:
-                                time_off_blocked.append({
-                                    "nurse": n.name,
-                                    "nurse_id": n.id,
-                                    "date": off_date_str,
-                                    "reason": reason,
-                                    "shifts_blocked": shifts_blocked
-                                })
-                        except ValueError:
-                            logger.warning(f"Invalid date format in adhoc request: {request}")
+                try:
+                    time_off = _parse_time_off_request(request)
+                except ValueError:
+                    logger.warning(f"Invalid date format in adhoc request: {request}")
+                    continue
+                if time_off:
+                    off_date_str, off_date, reason = time_off
+                    # Block all shifts on this date for this nurse
+                    off_shifts = shifts_by_date.get(off_date, [])
+                    for var in nurse_vars(i, off_shifts):
+                        model.Add(var == 0)
+                    shifts_blocked = len(off_shifts)
+                    if shifts_blocked > 0:
+                        time_off_blocked.append({
+                            "nurse": n.name,
+                            "nurse_id": n.id,
+                            "date": off_date_str,
+                            "reason": reason,
+                            "shifts_blocked": shifts_blocked
+                        })
 
     if time_off_blocked:
         logger.info(f"Time-off constraints applied: {len(time_off_blocked)} nurse-date combinations blocked")
@@ -1151,89 +1258,91 @@ def _solve_roster_internal(nurses_objs: list, shifts_objs: list, nurse_stats: di
     # Soft Constraints (Preferences) - build objective function
     objective_terms = []
 
-    # Add small random noise to each assignment for variation on regeneration
-    # This ensures equivalent solutions get slightly different scores,
-    # causing the solver to pick different valid schedules each time
-    # Note: CP-SAT requires integer coefficients, so we use small integers (±1)
-    for n in nurses_objs:
-        for s in shifts_objs:
-            # Small integer noise - enough to break ties but not override real preferences
-            # Real preferences use values like 3, 5, 10, 25, 30, 50 - so ±1 won't dominate
-            noise = random.randint(-1, 1)
-            if noise != 0:
-                objective_terms.append(noise * assignments[(n.id, s.id)])
-
     # Soft Constraint: Prefer Senior nurses on shifts (for coverage)
-    for s in shifts_objs:
-        for n in nurses_objs:
-            if n.seniority_level == "Senior":
+    for row in senior_rows:
+        for var in row:
+            if var is not None:
                 # Bonus for having a Senior nurse on shift
-                objective_terms.append(WEIGHT_SENIOR_BONUS * assignments[(n.id, s.id)])
-
-    for n in nurses_objs:
+                objective_terms.append(WEIGHT_SENIOR_BONUS * var)
+
+    # Shift indices for the preference and fairness terms, computed once so
+    # each nurse only visits the shifts a term applies to
+    weekend_shifts = []
+    night_shifts = []
+    shifts_by_day_name = defaultdict(list)
+    for j, s in enumerate(shifts_objs):
+        if s.start_time.weekday() >= 5:
+            weekend_shifts.append(j)
+        if s.is_night:
+            night_shifts.append(j)
+        shifts_by_day_name[s.start_time.strftime("%A")].append(j)
+
+    for i, n in enumerate(nurses_objs):
         stats = nurse_stats.get(n.id, {})
         fatigue_score = stats.get("fatigue_score", 0.0)
+        avoids_nights = bool(n.preferences and n.preferences.avoid_night_shifts)
+        preferred_days = set(n.preferences.preferred_days) if n.preferences else set()
 
-        for s in shifts_objs:
-            # Fatigue-aware scheduling
+        # Fatigue-aware scheduling
+        if fatigue_score >= FATIGUE_MODERATE_THRESHOLD:
             if fatigue_score >= FATIGUE_HIGH_THRESHOLD:
-                objective_terms.append(WEIGHT_FATIGUE_HIGH_PENALTY * assignments[(n.id, s.id)])
-            elif fatigue_score >= FATIGUE_MODERATE_THRESHOLD:
-                objective_terms.append(WEIGHT_FATIGUE_MODERATE_PENALTY * assignments[(n.id, s.id)])
+                weight = WEIGHT_FATIGUE_HIGH_PENALTY
+            else:
+                weight = WEIGHT_FATIGUE_MODERATE_PENALTY
+            objective_terms.extend(weight * var for var in nurse_vars(i))
 
             # Extra penalty for weekend/night shifts for fatigued nurses
-            if fatigue_score >= FATIGUE_MODERATE_THRESHOLD:
-                if s.start_time.weekday() >= 5:
-                    objective_terms.append(WEIGHT_FATIGUE_WEEKEND_PENALTY * assignments[(n.id, s.id)])
-                if _is_night_shift(s):
-                    objective_terms.append(WEIGHT_FATIGUE_NIGHT_PENALTY * assignments[(n.id, s.id)])
-
-            # Preference: Avoid night shifts
-            if n.preferences and n.preferences.avoid_night_shifts:
-                if _is_night_shift(s):
-                    objective_terms.append(WEIGHT_AVOID_NIGHT_PENALTY * assignments[(n.id, s.id)])
-
-            # Preference: Preferred days bonus
-            if n.preferences and n.preferences.preferred_days:
-                day_name = s.start_time.strftime("%A")
-                if day_name in n.preferences.preferred_days:
-                    objective_terms.append(WEIGHT_PREFERRED_DAY_BONUS * assignments[(n.id, s.id)])
+            objective_terms.extend(WEIGHT_FATIGUE_WEEKEND_PENALTY * var
+                                   for var in nurse_vars(i, weekend_shifts))
+            objective_terms.extend(WEIGHT_FATIGUE_NIGHT_PENALTY * var
+                                   for var in nurse_vars(i, night_shifts))
 
-    # Fairness: Even distribution of shifts
-    for n in nurses_objs:
-        nurse_total = sum(assignments[(n.id, s.id)] for s in shifts_objs)
-        fair_share = len(shifts_objs) // len(nurses_objs)
+        # Preference: Avoid night shifts
+        if avoids_nights:
+            objective_terms.extend(WEIGHT_AVOID_NIGHT_PENALTY * var
+                                   for var in nurse_vars(i, night_shifts))
 
-        # Penalize both over-assignment AND under-assignment
-        excess = model.NewIntVar(0, len(shifts_objs), f'excess_{n.id}')
-        deficit = model.NewIntVar(0, len(shifts_objs), f'deficit_{n.id}')
-        model.Add(excess >= nurse_total - fair_share)
-        model.Add(deficit >= fair_share - nurse_total)
-        objective_terms.append(WEIGHT_EXCESS_SHIFTS_PENALTY * excess)
-        objective_terms.append(WEIGHT_DEFICIT_SHIFTS_PENALTY * deficit)
+        # Preference: Preferred days bonus
+        for day_name in preferred_days:
+            objective_terms.extend(WEIGHT_PREFERRED_DAY_BONUS * var
+                                   for var in nurse_vars(i, shifts_by_day_name.get(day_name, ())))
+
+    # Fairness: Even distribution of shifts
+    # Penalize the spread between the busiest and the least busy nurse, which
+    # needs two global variables instead of an excess/deficit pair per nurse
+    max_load = model.NewIntVar(0, num_shifts, 'max_load')
+    min_load = model.NewIntVar(0, num_shifts, 'min_load')
+    for i in range(num_nurses):
+        nurse_total = sum(nurse_vars(i))
+        model.Add(max_load >= nurse_total)
+        model.Add(min_load <= nurse_total)
+    objective_terms.append(WEIGHT_LOAD_SPREAD_PENALTY * (max_load - min_load))
 
     # Fairness: Distribute weekend shifts fairly
-    weekend_shifts = [s for s in shifts_objs if s.start_time.weekday() >= 5]
     if weekend_shifts:
-        fair_weekend_share = max(1, len(weekend_shifts) // len(nurses_objs))
-        for n in nurses_objs:
-            weekend_total = sum(assignments[(n.id, s.id)] for s in weekend_shifts)
-            weekend_excess = model.NewIntVar(0, len(weekend_shifts), f'weekend_excess_{n.id}')
-            model.Add(weekend_excess >= weekend_total - fair_weekend_share)
+        fair_weekend_share = max(1, len(weekend_shifts) // num_nurses)
+        for i, n in enumerate(nurses_objs):
+            weekend_vars = nurse_vars(i, weekend_shifts)
+            # A nurse eligible for no more than the fair share can never exceed it
+            if len(weekend_vars) <= fair_weekend_share:
+                continue
+            weekend_excess = model.NewIntVar(0, len(weekend_vars) - fair_weekend_share, f'weekend_excess_{n.id}')
+            model.Add(weekend_excess >= sum(weekend_vars) - fair_weekend_share)
             objective_terms.append(WEIGHT_WEEKEND_EXCESS_PENALTY * weekend_excess)
 
     # Fairness: Distribute night shifts fairly among eligible nurses
-    night_shifts = [s for s in shifts_objs if _is_night_shift(s)]
     if night_shifts:
         # Only count nurses who don't avoid night shifts
-        eligible_for_nights = [n for n in nurses_objs
+        eligible_for_nights = [(i, n) for i, n in enumerate(nurses_objs)
                                if not (n.preferences and n.preferences.avoid_night_shifts)]
         if eligible_for_nights:
             fair_night_share = max(1, len(night_shifts) // len(eligible_for_nights))
-            for n in eligible_for_nights:
-                night_total = sum(assignments[(n.id, s.id)] for s in night_shifts)
-                night_excess = model.NewIntVar(0, len(night_shifts), f'night_excess_{n.id}')
-                model.Add(night_excess >= night_total - fair_night_share)
+            for i, n in eligible_for_nights:
+                night_vars = nurse_vars(i, night_shifts)
+                if len(night_vars) <= fair_night_share:
+                    continue
+                night_excess = model.NewIntVar(0, len(night_vars) - fair_night_share, f'night_excess_{n.id}')
+                model.Add(night_excess >= sum(night_vars) - fair_night_share)
                 objective_terms.append(WEIGHT_NIGHT_EXCESS_PENALTY * night_excess)
 
     if objective_terms:
@@ -1243,7 +1352,9 @@ def _solve_roster_internal(nurses_objs: list, shifts_objs: list, nurse_stats: di
     # Add solver parameters for better performance
     solver.parameters.max_time_in_seconds = 30.0
     solver.parameters.num_search_workers = 8
-    # Add random seed to get different solutions on regeneration
+    # Randomized search with a fresh seed picks a different schedule among
+    # equally good ones on each regeneration
+    solver.parameters.randomize_search = True
     solver.parameters.random_seed = random.randint(0, 2**31 - 1)
 
     logger.debug(f"Solver configured: max_time=30s, workers=8, seed={solver.parameters.random_seed}")
@@ -1261,11 +1372,11 @@ def _solve_roster_internal(nurses_objs: list, shifts_objs: list, nurse_stats: di
     logger.info(f"Solver finished: status={status_name}, time={solver.WallTime():.2f}s")
 
     if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-        roster_assignments = []
-        for n in nurses_objs:
-            for s in shifts_objs:
-                if solver.Value(assignments[(n.id, s.id)]) == 1:
-                    roster_assignments.append(Assignment(nurse_id=n.id, shift_id=s.id))
+        roster_assignments = [
+            Assignment.model_construct(nurse_id=nurse_id, shift_id=shift_id)
+            for nurse_id, shift_id, var in all_vars
+            if solver.BooleanValue(var)
+        ]
 
         roster_id = _generate_roster_id()
         roster = Roster(
@@ -1281,9 +1392,7 @@ def _solve_roster_internal(nurses_objs: list, shifts_objs: list, nurse_stats: di
 
         # Auto-save roster to disk immediately (don't rely on LLM calling save_draft_roster)
         roster_dict = roster.model_dump()
-        _auto_save_roster(roster_id, roster_dict, shifts_objs)
-
-        return json.dumps(roster_dict, default=str)
+        return _auto_save_roster(roster_id, roster_dict, shifts_objs)
     else:
         # Analyze why the solver failed and provide recommendations
         logger.warning("Solver failed to find feasible solution, running infeasibility analysis")
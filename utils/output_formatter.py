@@ -3,35 +3,170 @@ Universal output formatter for chat-friendly rendering.
 Detects content type and converts to well-formatted markdown.
 """
 import re
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Tuple
+
+if TYPE_CHECKING:
+    from datetime import datetime
+
+# Number of distinct texts whose formatted output is kept (see OutputFormatter.format)
+FORMAT_CACHE_SIZE = 256
+
+# =============================================================================
+# Compiled patterns
+# =============================================================================
+
+# Detection
+# Upper-case keywords each content type needs; only the types whose keywords
+# appear in the text are checked with their full detection pattern
+_DISPATCH_KEYWORDS = (
+    ("roster", ("ROSTER_", "ASSIGNMENTS:")),
+    ("nurse_list", ("[OK]", "[HIGH]", "[MOD]", "ALL NURSES", "SENIOR NURSES", "AVAILABLE NURSES")),
+    ("availability", ("NURSE AVAILABILITY",)),
+    ("nurse_profile", ("NURSE PROFILE:",)),
+    ("shifts_list", ("SHIFTS TO BE FILLED",)),
+)
+_RE_NURSE_LIST_ENTRY = re.compile(r'\[(OK|HIGH|MOD)\].*nurse_\d+')
+_RE_NURSE_LIST_TITLE = re.compile(r'(ALL NURSES|SENIOR NURSES|AVAILABLE NURSES).*={10,}', re.I | re.S)
+_ROSTER_LIST_TITLES = ("ALL ROSTERS", "PENDING ROSTERS")  # matched against upper-cased text
+_RE_ROSTER_HEADER = re.compile(r'ROSTER[:\s].*roster_\d+', re.I)
+_RE_ASSIGNMENTS_WITH_DATE = re.compile(r'ASSIGNMENTS:.*\d{4}-\d{2}-\d{2}', re.I | re.S)
+_RE_AVAILABILITY = re.compile(r'NURSE AVAILABILITY.*\d{4}-\d{2}-\d{2}', re.I)
+
+# Shared
+_RE_DATE = re.compile(r'(\d{4}-\d{2}-\d{2})')
+_RE_DATE_WITH_DAY = re.compile(r'(\d{4}-\d{2}-\d{2})\s*\((\w+)\)')
+
+# Nurse list
+_RE_NURSE_ENTRY = re.compile(r'\[(OK|HIGH|MOD)\]\s+(\w+)\s+\((nurse_\d+)\)')
+_RE_TOTAL_NURSES = re.compile(r'Total:\s*(\d+)\s*nurses', re.I)
+
+# Roster
+_RE_ROSTER_ID = re.compile(r'(roster_[\w]+)', re.I)
+_RE_STATUS = re.compile(r'Status:\s*(\w+)', re.I)
+_RE_PERIOD = re.compile(r'Period:\s*(\d{4}-\d{2}-\d{2}).*?to\s*(\d{4}-\d{2}-\d{2})', re.I)
+_RE_COMPLIANCE = re.compile(r'Compliance:\s*(\w+)', re.I)
+_RE_EMPATHY = re.compile(r'Empathy.*?:\s*([\d.]+)', re.I)
+_RE_ARROW_ASSIGNMENT = re.compile(r'(nurse_\d+)\s*(?:→|->)\s*(\w+)')
+_RE_DICT_ASSIGNMENT = re.compile(r"'nurse_id':\s*'(nurse_\d+)'.*?'shift_id':\s*'(shift_\d+)'")
+_RE_DATE_HEADER = re.compile(r'📅\s*(\d{4}-\d{2}-\d{2})\s*\((\w+)\)')
+_RE_ASSIGNMENT_LINE = re.compile(r'(\d{2}:\d{2})-(\d{2}:\d{2})\s*\|\s*(\w+)[^|]*\|\s*([^(]+)\((nurse_\d+)\)')
+
+# Availability
+# Section header with its count, e.g. "UNAVAILABLE (1):"; leftmost match wins, so
+# UNAVAILABLE is never read as AVAILABLE. Markdown emphasis may precede the count.
+_RE_SECTION_HEADER = re.compile(r'(UNAVAILABLE|LIMITED.*AVAILABILITY|AVAILABLE)[*_\s]*\((\d+)\)', re.I)
+_SECTION_KEYS = {"UNAVAILABLE": "unavailable", "AVAILABLE": "available"}
+
+# Nurse profile
+_RE_PROFILE_NAME = re.compile(r'NURSE PROFILE:\s*(\w+)', re.I)
+# "Label: value" lines shared by the profile and staffing summary outputs
+_RE_LABELLED_FIELD = re.compile(r'^[ \t]*([^:\n]+?):[ \t]*(\S[^\n]*)', re.M)
+_LABEL_MARKUP = " \t-*•_"  # Bullets and emphasis stripped from both ends of a label
+
+# Staffing summary
+_RE_SUMMARY_GOOD = re.compile(r'\[OK\].*?Good:\s*(\d+)', re.I)
+_RE_SUMMARY_MODERATE = re.compile(r'\[MOD\].*?Moderate:\s*(\d+)', re.I)
+_RE_SUMMARY_HIGH = re.compile(r'\[HIGH\].*?High Risk:\s*(\d+)', re.I)
+_RE_SUMMARY_TOTAL_SHIFTS = re.compile(r'Total:\s*(\d+)\s*shifts', re.I | re.S)
+_RE_SUMMARY_ICU = re.compile(r'ICU:\s*(\d+)')
+_RE_SUMMARY_EMERGENCY = re.compile(r'Emergency:\s*(\d+)')
+_RE_SUMMARY_GENERAL = re.compile(r'General:\s*(\d+)')
+_RE_SUMMARY_ALERTS_SECTION = re.compile(r'ALERTS:\s*(.*?)(?:\n\n|\Z)', re.I | re.S)
+
+# Shifts list
+_RE_SHIFTS_DAYS = re.compile(r'\((\d+)\s*days\)', re.I)
+_RE_SHIFT_ENTRY = re.compile(r'(shift_\d+):\s*(\w+)\s*Ward')
+_RE_SHIFT_TIME = re.compile(r'Time:\s*(\d{2}:\d{2})\s*-\s*(\d{2}:\d{2})')
+_RE_SHIFT_REQUIREMENTS = re.compile(r'Required:\s*([^|]+)\|\s*Min Level:\s*(\w+)')
+_RE_TOTAL_SHIFTS = re.compile(r'Total shifts:\s*(\d+)', re.I)
+
+# Pending rosters
+_RE_PENDING_ROSTER_ID = re.compile(r'(roster_\w+)')
+_RE_PENDING_PERIOD = re.compile(r'Period:\s*(\S+)\s*to\s*(\S+)')
+_RE_PENDING_GENERATED = re.compile(r'Generated:\s*(.+)')
+_RE_PENDING_ASSIGNMENTS = re.compile(r'Assignments:\s*(\d+)')
+
+
+@lru_cache(maxsize=1024)
+def _parse_ymd(date_str: str) -> "datetime":
+    """Parse a YYYY-MM-DD date; the same few dates recur across outputs."""
+    from datetime import datetime
+    return datetime.strptime(date_str, "%Y-%m-%d")
+
+
+@lru_cache(maxsize=1024)
+def _day_labels(day: "datetime") -> tuple:
+    """Calendar key and column header for a date, e.g. ("2025-12-08", "Mon 08")."""
+    return day.strftime("%Y-%m-%d"), day.strftime("%a %d")
+
+
+def _labelled_fields(text: str) -> Dict[str, str]:
+    """
+    Map each lower-cased "Label:" in text to the value of its first occurrence.
+
+    The LLM may rewrite tool output as markdown, so list bullets and emphasis
+    around the label ("- ID:", "**ID:** nurse_005") are ignored.
+    """
+    fields: Dict[str, str] = {}
+    for label, value in _RE_LABELLED_FIELD.findall(text):
+        label = label.strip(_LABEL_MARKUP).lower()
+        if value.startswith(("**", "__")):
+            value = value[2:]  # Closing emphasis of a "**Label:**" label
+        value = value.strip()
+        if label and value:
+            fields.setdefault(label, value)
+    return fields
 
 
 class OutputFormatter:
     """Converts agent output to well-formatted markdown."""
 
+    def __init__(self) -> None:
+        # Formatting depends only on the text, so each formatter keeps its
+        # recent outputs; reuse one instance to benefit from the cache
+        self._format_cached = lru_cache(maxsize=FORMAT_CACHE_SIZE)(self._format)
+
     def format(self, text: str) -> str:
         """
         Detect content type and apply appropriate formatting.
+
+        Repeated outputs are served from this formatter's cache.
         """
-        if not text:
+        # Short replies ("OK", "done") are too small to hold any formatted
+        # content type, so they skip detection and the cache entirely
+        if not text or len(text) < 32:
+            return text
+        return self._format_cached(text)
+
+    def _format(self, text: str) -> str:
+        """Uncached body of format()."""
+        upper_text = text.upper()
+        kinds = {kind for kind, keywords in _DISPATCH_KEYWORDS
+                 if any(keyword in upper_text for keyword in keywords)}
+        # Roster list outputs (ALL ROSTERS, PENDING ROSTERS) are not calendars
+        if any(title in upper_text for title in _ROSTER_LIST_TITLES):
+            kinds.discard("roster")
+        if not kinds:
+            # No special formatting needed
             return text
 
-        # Try each formatter in order of specificity
-        if self._is_roster(text):
-            return self._format_roster(text)
-        elif self._is_nurse_list(text):
-            return self._format_nurse_list(text)
-        elif self._is_availability(text):
-            return self._format_availability(text)
-        elif self._is_nurse_profile(text):
-            return self._format_nurse_profile(text)
-        elif self._is_staffing_summary(text):
-            return self._format_staffing_summary(text)
-        elif self._is_shifts_list(text):
-            return self._format_shifts_list(text)
-        elif self._is_pending_rosters(text):
-            return self._format_pending_rosters(text)
+        # Split once; formatters that walk the text line by line share the list
+        lines = text.splitlines()
+
+        # Try each formatter in order of specificity. The staffing summary and
+        # pending rosters detectors are disabled, so they are not dispatched.
+        formatters = (
+            ("roster", self._is_roster, self._format_roster),
+            ("nurse_list", self._is_nurse_list, self._format_nurse_list),
+            ("availability", self._is_availability, self._format_availability),
+            # These types are identified by their keyword alone
+            ("nurse_profile", None, self._format_nurse_profile),
+            ("shifts_list", None, self._format_shifts_list),
+        )
+        for kind, is_kind, format_kind in formatters:
+            if kind in kinds and (is_kind is None or is_kind(text)):
+                return format_kind(text, lines)
 
         # No special formatting needed
         return text
@@ -41,32 +176,24 @@ class OutputFormatter:
     # =========================================================================
 
     def _is_nurse_list(self, text: str) -> bool:
-        return bool(re.search(r'\[(OK|HIGH|MOD)\].*nurse_\d+', text)) or \
-               bool(re.search(r'(ALL NURSES|SENIOR NURSES|AVAILABLE NURSES).*={10,}', text, re.I | re.S))
+        return bool(_RE_NURSE_LIST_ENTRY.search(text)) or \
+               bool(_RE_NURSE_LIST_TITLE.search(text))
 
     def _is_roster(self, text: str) -> bool:
         # Detect roster output that needs calendar formatting
         # Match patterns like "ROSTER:" or roster IDs with assignments
-        # BUT exclude list outputs (ALL ROSTERS, PENDING ROSTERS)
-        if re.search(r'ALL ROSTERS|PENDING ROSTERS', text, re.I):
-            return False
-        return bool(re.search(r'ROSTER[:\s].*roster_\d+', text, re.I)) or \
-               bool(re.search(r'ASSIGNMENTS:.*\d{4}-\d{2}-\d{2}', text, re.I | re.S))
+        # List outputs (ALL ROSTERS, PENDING ROSTERS) are excluded by _format
+        return bool(_RE_ROSTER_HEADER.search(text)) or \
+               bool(_RE_ASSIGNMENTS_WITH_DATE.search(text))
 
     def _is_availability(self, text: str) -> bool:
-        return bool(re.search(r'NURSE AVAILABILITY.*\d{4}-\d{2}-\d{2}', text, re.I))
-
-    def _is_nurse_profile(self, text: str) -> bool:
-        return bool(re.search(r'NURSE PROFILE:', text, re.I))
+        return bool(_RE_AVAILABILITY.search(text))
 
     def _is_staffing_summary(self, text: str) -> bool:
         # Disabled - the raw output is already well-formatted and regex parsing
         # causes issues when LLM reformats the content before callback
         return False
 
-    def _is_shifts_list(self, text: str) -> bool:
-        return bool(re.search(r'SHIFTS TO BE FILLED', text, re.I))
-
     def _is_pending_rosters(self, text: str) -> bool:
         # Disabled - the raw output is already well-formatted
         return False
@@ -75,24 +202,19 @@ class OutputFormatter:
     # Formatting methods
     # =========================================================================
 
-    def _format_nurse_list(self, text: str) -> str:
+    def _format_nurse_list(self, text: str, lines: List[str]) -> str:
         """Format nurse list as markdown table."""
-        lines = text.strip().split('\n')
-
-        # Extract title from first line
-        title = "Nurses"
-        if lines and '=' in lines[0]:
-            title = lines[0].strip()
-        elif lines:
-            title = lines[0].strip()
+        # Extract title from first non-blank line
+        title = next((line.strip() for line in lines if line.strip()), "Nurses")
 
         # Parse nurse entries
-        nurses = []
+        nurses: List[Dict[str, str]] = []
         i = 0
         while i < len(lines):
-            line = lines[i].strip()
-            # Match pattern: [OK] Name (nurse_xxx) or similar
-            match = re.match(r'\[(OK|HIGH|MOD)\]\s+(\w+)\s+\((nurse_\d+)\)', line)
+            # Match pattern: [OK] Name (nurse_xxx) or similar; only entry
+            # lines are stripped and matched
+            line = lines[i]
+            match = _RE_NURSE_ENTRY.match(line.strip()) if '(nurse_' in line else None
             if match:
                 status_code = match.group(1)
                 name = match.group(2)
@@ -107,10 +229,10 @@ class OutputFormatter:
                     i += 1
 
                 # Parse details: "Senior | FullTime | ACLS, BLS, ICU"
-                parts = [p.strip() for p in details.split('|')]
-                level = parts[0] if len(parts) > 0 else ""
-                contract = parts[1] if len(parts) > 1 else ""
-                certs = parts[2] if len(parts) > 2 else ""
+                fields = [p.strip() for p in details.split('|')]
+                level = fields[0] if len(fields) > 0 else ""
+                contract = fields[1] if len(fields) > 1 else ""
+                certs = fields[2] if len(fields) > 2 else ""
 
                 nurses.append({
                     "status": status,
@@ -126,83 +248,141 @@ class OutputFormatter:
             return text  # Couldn't parse, return original
 
         # Build markdown table
-        result = f"## {title}\n\n"
-        result += "| Status | Name | ID | Level | Contract | Certifications |\n"
-        result += "|--------|------|----|-------|----------|----------------|\n"
+        parts = [f"## {title}\n\n"]
+        parts.append("| Status | Name | ID | Level | Contract | Certifications |\n")
+        parts.append("|--------|------|----|-------|----------|----------------|\n")
 
         for n in nurses:
-            result += f"| {n['status']} | {n['name']} | {n['id']} | {n['level']} | {n['contract']} | {n['certs']} |\n"
+            parts.append(f"| {n['status']} | {n['name']} | {n['id']} | {n['level']} | {n['contract']} | {n['certs']} |\n")
 
         # Extract total if present
-        total_match = re.search(r'Total:\s*(\d+)\s*nurses', text, re.I)
+        total_match = _RE_TOTAL_NURSES.search(text)
         if total_match:
-            result += f"\n**Total: {total_match.group(1)} nurses**"
+            parts.append(f"\n**Total: {total_match.group(1)} nurses**")
 
-        return result
+        return "".join(parts)
 
-    def _format_roster(self, text: str) -> str:
+    def _format_roster(self, text: str, lines: List[str]) -> str:
         """Format roster as 7-day calendar view."""
+        # Only the roster calendar needs date arithmetic
+        from datetime import timedelta
+
         # Extract roster ID - handles formats like roster_202512052008 or roster_20251209165648_2930
-        roster_match = re.search(r'(roster_[\w]+)', text, re.I)
+        roster_match = _RE_ROSTER_ID.search(text)
         roster_id = roster_match.group(1) if roster_match else "Unknown"
 
         # Extract status
-        status_match = re.search(r'Status:\s*(\w+)', text, re.I)
+        status_match = _RE_STATUS.search(text)
         status = status_match.group(1).upper() if status_match else "DRAFT"
 
         # Extract period
-        period_match = re.search(r'Period:\s*(\d{4}-\d{2}-\d{2}).*?to\s*(\d{4}-\d{2}-\d{2})', text, re.I)
+        period_match = _RE_PERIOD.search(text)
         if period_match:
             start_date_str = period_match.group(1)
             end_date_str = period_match.group(2)
         else:
-            # Try to infer from assignments
-            date_matches = re.findall(r'(\d{4}-\d{2}-\d{2})', text)
-            if date_matches:
-                start_date_str = min(date_matches)
-                end_date_str = max(date_matches)
-            else:
+            # Try to infer from assignments: the earliest and latest date in the
+            # text (ISO dates compare correctly as strings)
+            start_date_str = end_date_str = None
+            for date_match in _RE_DATE.finditer(text):
+                date_str = date_match.group(1)
+                if start_date_str is None or date_str < start_date_str:
+                    start_date_str = date_str
+                if end_date_str is None or date_str > end_date_str:
+                    end_date_str = date_str
+            if start_date_str is None:
                 return text  # Can't determine period
 
         # Extract compliance and empathy
-        compliance_match = re.search(r'Compliance:\s*(\w+)', text, re.I)
+        compliance_match = _RE_COMPLIANCE.search(text)
         compliance = compliance_match.group(1) if compliance_match else "N/A"
 
-        empathy_match = re.search(r'Empathy.*?:\s*([\d.]+)', text, re.I)
+        empathy_match = _RE_EMPATHY.search(text)
         empathy = empathy_match.group(1) if empathy_match else "N/A"
 
         # Parse assignments - look for nurse_id -> shift patterns
-        assignments = []
+        assignments: List[Dict[str, str]] = []
         # Pattern: nurse_xxx → Ward or nurse_xxx -> shift_xxx
-        for match in re.finditer(r'(nurse_\d+)\s*(?:→|->)\s*(\w+)', text):
+        for match in _RE_ARROW_ASSIGNMENT.finditer(text):
             nurse_id = match.group(1)
             info = match.group(2)
             assignments.append({"nurse_id": nurse_id, "info": info})
 
         # Also try parsing structured assignment lines
-        for match in re.finditer(r"'nurse_id':\s*'(nurse_\d+)'.*?'shift_id':\s*'(shift_\d+)'", text):
+        for match in _RE_DICT_ASSIGNMENT.finditer(text):
             nurse_id = match.group(1)
             shift_id = match.group(2)
             assignments.append({"nurse_id": nurse_id, "shift_id": shift_id})
 
-        # Pattern: time | ward | name (nurse_id) - format from get_roster()
-        for match in re.finditer(r'(\d{2}:\d{2}-\d{2}:\d{2})\s*\|\s*(\w+)[^|]*\|\s*[^(]+\((nurse_\d+)\)', text):
-            time_info = match.group(1)
-            ward = match.group(2)
-            nurse_id = match.group(3)
-            assignments.append({"nurse_id": nurse_id, "info": f"{ward} ({time_info})"})
+        # Assignments in the get_roster() format carry the dates the calendar
+        # needs: lines like "   07:00-15:00 | Ward A     | Alice Smith (nurse_001)"
+        # under a date header "📅 2025-12-04 (Wednesday)". One pass over the
+        # lines collects them and builds the calendar at the same time.
+        nurse_schedule: Dict[str, Dict[str, str]] = {}  # {nurse_id: {date_str: ward_shift_type}}
+        nurse_names: Dict[str, str] = {}                # {nurse_id: name}
+        cell_cache: Dict[Tuple[str, str], str] = {}     # {(ward, shift_type): cell text}, a handful of entries
+
+        # Substring checks skip the regexes on lines that cannot match them
+        current_date: Optional[str] = None
+        for line in lines:
+            # Pattern: time | ward | name (nurse_id)
+            if '|' in line and '(nurse_' in line:
+                line_assignments = list(_RE_ASSIGNMENT_LINE.finditer(line))
+                for match in line_assignments:
+                    assignments.append({
+                        "nurse_id": match.group(5),
+                        "info": f"{match.group(3)} ({match.group(1)}-{match.group(2)})"
+                    })
+            else:
+                line_assignments = []
+
+            # Match date header: "📅 2025-12-04 (Wednesday)"
+            if '📅' in line:
+                date_header = _RE_DATE_HEADER.search(line)
+                if date_header:
+                    current_date = date_header.group(1)
+                    continue
+
+            if line_assignments and current_date:
+                assign_match = line_assignments[0]
+                start_time = assign_match.group(1)
+                ward = assign_match.group(3)[:3]  # Truncate ward name
+                name = assign_match.group(4).strip()
+                nurse_id = assign_match.group(5)
+
+                # Determine shift type from start time
+                hour = int(start_time.split(':')[0])
+                if hour >= 20 or hour < 6:
+                    shift_type = "N"  # Night
+                elif hour >= 14:
+                    shift_type = "E"  # Evening
+                else:
+                    shift_type = "D"  # Day
+
+                if nurse_id not in nurse_schedule:
+                    nurse_schedule[nurse_id] = {}
+
+                val = cell_cache.get((ward, shift_type))
+                if val is None:
+                    val = cell_cache[(ward, shift_type)] = f"{ward}-{shift_type}"
+                if current_date in nurse_schedule[nurse_id]:
+                    nurse_schedule[nurse_id][current_date] += " " + val
+                else:
+                    nurse_schedule[nurse_id][current_date] = val
+
+                nurse_names[nurse_id] = name
 
         # Build header
-        result = f"## Roster: {roster_id}\n\n"
-        result += f"**Period**: {start_date_str} to {end_date_str} | "
-        result += f"**Status**: {status} | "
-        result += f"**Compliance**: {compliance} | "
-        result += f"**Empathy**: {empathy}\n\n"
+        parts = [f"## Roster: {roster_id}\n\n"]
+        parts.append(f"**Period**: {start_date_str} to {end_date_str} | ")
+        parts.append(f"**Status**: {status} | ")
+        parts.append(f"**Compliance**: {compliance} | ")
+        parts.append(f"**Empathy**: {empathy}\n\n")
 
         # Build calendar view
         try:
-            start_date = datetime.strptime(start_date_str, "%Y-%m-%d")
-            end_date = datetime.strptime(end_date_str, "%Y-%m-%d")
+            start_date = _parse_ymd(start_date_str)
+            end_date = _parse_ymd(end_date_str)
             total_days = (end_date - start_date).days + 1
 
             if not assignments:
@@ -210,122 +390,71 @@ class OutputFormatter:
                 # This happens when LLM summarizes instead of returning raw tool output
                 return text
 
-            # Parse assignments with date info from get_roster() format
-            # Format: "📅 2025-12-04 (Wednesday)" followed by assignment lines
-            # "   07:00-15:00 | Ward A     | Alice Smith (nurse_001)"
-            nurse_schedule = {}  # {nurse_id: {date_str: ward_shift_type}}
-            nurse_names = {}     # {nurse_id: name}
-
-            current_date = None
-            for line in text.split('\n'):
-                # Match date header: "📅 2025-12-04 (Wednesday)"
-                date_header = re.search(r'📅\s*(\d{4}-\d{2}-\d{2})\s*\((\w+)\)', line)
-                if date_header:
-                    current_date = date_header.group(1)
-                    continue
-
-                # Match assignment: "   07:00-15:00 | Ward A     | Alice Smith (nurse_001)"
-                assign_match = re.search(r'(\d{2}:\d{2})-(\d{2}:\d{2})\s*\|\s*(\w+)[^|]*\|\s*([^(]+)\((nurse_\d+)\)', line)
-                if assign_match and current_date:
-                    start_time = assign_match.group(1)
-                    ward = assign_match.group(3)[:3]  # Truncate ward name
-                    name = assign_match.group(4).strip()
-                    nurse_id = assign_match.group(5)
-
-                    # Determine shift type from start time
-                    hour = int(start_time.split(':')[0])
-                    if hour >= 20 or hour < 6:
-                        shift_type = "N"  # Night
-                    elif hour >= 14:
-                        shift_type = "E"  # Evening
-                    else:
-                        shift_type = "D"  # Day
-
-                    if nurse_id not in nurse_schedule:
-                        nurse_schedule[nurse_id] = {}
-                    
-                    val = f"{ward}-{shift_type}"
-                    if current_date in nurse_schedule[nurse_id]:
-                        nurse_schedule[nurse_id][current_date] += " " + val
-                    else:
-                        nurse_schedule[nurse_id][current_date] = val
-                    
-                    nurse_names[nurse_id] = name
-
             if not nurse_schedule:
                 # Fallback: show simple summary if calendar parsing failed
-                nurse_assignments = {}
+                nurse_assignments: Dict[str, List[str]] = {}
                 for a in assignments:
                     nid = a.get("nurse_id", "")
                     if nid not in nurse_assignments:
                         nurse_assignments[nid] = []
                     nurse_assignments[nid].append(a.get("info") or a.get("shift_id", ""))
 
-                result += "### Assignments Summary\n\n"
-                result += "| Nurse | Shifts |\n"
-                result += "|-------|--------|\n"
+                parts.append("### Assignments Summary\n\n")
+                parts.append("| Nurse | Shifts |\n")
+                parts.append("|-------|--------|\n")
                 for nurse_id, shifts in sorted(nurse_assignments.items()):
-                    result += f"| {nurse_id} | {len(shifts)} shifts |\n"
-                result += f"\n**Total**: {len(assignments)} assignments across {len(nurse_assignments)} nurses\n"
-                return result
+                    parts.append(f"| {nurse_id} | {len(shifts)} shifts |\n")
+                parts.append(f"\n**Total**: {len(assignments)} assignments across {len(nurse_assignments)} nurses\n")
+                return "".join(parts)
+
+            # Build the full nurse x date grid once; each week slices it
+            day_labels = [_day_labels(start_date + timedelta(days=i)) for i in range(max(total_days, 0))]
+            date_strs = [date_str for date_str, _ in day_labels]
+            day_headers = [header for _, header in day_labels]
+            # Rows are listed by nurse name, which reads better than ID order
+            roster_nurse_ids = sorted(nurse_schedule, key=lambda nid: nurse_names.get(nid, nid))
+            grid: List[Tuple[str, List[str], List[int]]] = []  # (name, cells, shifts per cell) per nurse
+            for nurse_id in roster_nurse_ids:
+                schedule = nurse_schedule[nurse_id]
+                cells = [schedule.get(date_str, "-") for date_str in date_strs]
+                counts = [0 if cell == "-" else len(cell.split(" ")) for cell in cells]
+                grid.append((nurse_names.get(nurse_id, nurse_id), cells, counts))
 
             # Build 7-day calendar chunks
             chunk_size = 7
             num_chunks = (total_days + chunk_size - 1) // chunk_size
-            roster_nurse_ids = sorted(nurse_schedule.keys())
 
             for chunk_idx in range(num_chunks):
-                chunk_start = start_date + timedelta(days=chunk_idx * chunk_size)
-                chunk_end = min(chunk_start + timedelta(days=chunk_size - 1), end_date)
-                chunk_days = (chunk_end - chunk_start).days + 1
+                lo = chunk_idx * chunk_size
+                hi = min(lo + chunk_size, total_days)
 
                 if num_chunks > 1:
-                    result += f"### Week {chunk_idx + 1}\n\n"
-
-                # Build header row with day names
-                headers = ["Nurse"]
-                dates_in_chunk = []
-                for i in range(chunk_days):
-                    d = chunk_start + timedelta(days=i)
-                    dates_in_chunk.append(d.strftime("%Y-%m-%d"))
-                    day_abbr = d.strftime("%a")  # Mon, Tue, etc.
-                    day_num = d.strftime("%d")
-                    headers.append(f"{day_abbr} {day_num}")
-                headers.append("Total")
-
-                # Header row
-                result += "| " + " | ".join(headers) + " |\n"
-                result += "|" + "|".join(["---"] * len(headers)) + "|\n"
+                    parts.append(f"### Week {chunk_idx + 1}\n\n")
 
-                # Data rows
-                for nurse_id in roster_nurse_ids:
-                    name = nurse_names.get(nurse_id, nurse_id)
-                    row = [name]
-                    nurse_total = 0
+                # Header row with day names
+                headers = ["Nurse"] + day_headers[lo:hi] + ["Total"]
+                parts.append("| " + " | ".join(headers) + " |\n")
+                parts.append("|" + "|".join(["---"] * len(headers)) + "|\n")
 
-                    for date_str in dates_in_chunk:
-                        cell = nurse_schedule.get(nurse_id, {}).get(date_str, "-")
-                        row.append(cell)
-                        if cell != "-":
-                            nurse_total += len(cell.split(" "))
-
-                    row.append(str(nurse_total))
-                    result += "| " + " | ".join(row) + " |\n"
+                # Data rows
+                for name, cells, counts in grid:
+                    row = [name] + cells[lo:hi] + [str(sum(counts[lo:hi]))]
+                    parts.append("| " + " | ".join(row) + " |\n")
 
-                result += "\n"
+                parts.append("\n")
 
             # Legend
-            result += "**Legend**: D=Day | E=Evening | N=Night | Ward abbreviations (ICU, Gen, Eme, etc.)\n"
+            parts.append("**Legend**: D=Day | E=Evening | N=Night | Ward abbreviations (ICU, Gen, Eme, etc.)\n")
 
         except ValueError:
-            result += "_Could not parse roster dates_\n"
+            parts.append("_Could not parse roster dates_\n")
 
-        return result
+        return "".join(parts)
 
-    def _format_availability(self, text: str) -> str:
+    def _format_availability(self, text: str, lines: List[str]) -> str:
         """Format availability as sectioned list."""
         # Extract date
-        date_match = re.search(r'(\d{4}-\d{2}-\d{2})\s*\((\w+)\)', text)
+        date_match = _RE_DATE_WITH_DAY.search(text)
         if date_match:
             date_str = date_match.group(1)
             day_name = date_match.group(2)
@@ -333,183 +462,183 @@ class OutputFormatter:
             date_str = "Unknown"
             day_name = ""
 
-        result = f"## Availability: {date_str}"
+        parts = [f"## Availability: {date_str}"]
         if day_name:
-            result += f" ({day_name})"
-        result += "\n\n"
+            parts.append(f" ({day_name})")
+        parts.append("\n\n")
 
         # Parse sections
-        sections = {
+        sections: Dict[str, List[str]] = {
             "available": [],
             "limited": [],
             "unavailable": []
         }
-
-        current_section = None
-        for line in text.split('\n'):
+        # Counts stated in the section headers, keyed like sections
+        counts: Dict[str, str] = {}
+
+        # Section headers look like "AVAILABLE (3):", "LIMITED AVAILABILITY (2):"
+        # and "UNAVAILABLE (1):", possibly as markdown bullets ("- AVAILABLE (3):"),
+        # so they are recognized before entry lines, which start with a marker
+        current_section: Optional[str] = None
+        for line in lines:
             line = line.strip()
-            if re.search(r'AVAILABLE\s*\(\d+\)', line, re.I):
-                current_section = "available"
-                count_match = re.search(r'\((\d+)\)', line)
-                sections["available_count"] = count_match.group(1) if count_match else "0"
-            elif re.search(r'LIMITED.*AVAILABILITY\s*\(\d+\)', line, re.I):
-                current_section = "limited"
-                count_match = re.search(r'\((\d+)\)', line)
-                sections["limited_count"] = count_match.group(1) if count_match else "0"
-            elif re.search(r'UNAVAILABLE\s*\(\d+\)', line, re.I):
-                current_section = "unavailable"
-                count_match = re.search(r'\((\d+)\)', line)
-                sections["unavailable_count"] = count_match.group(1) if count_match else "0"
-            elif current_section and line.startswith(('+', '?', '-')):
+            header_match = _RE_SECTION_HEADER.search(line) if 'AVAILAB' in line.upper() else None
+            if header_match:
+                current_section = _SECTION_KEYS.get(header_match.group(1).upper(), "limited")
+                counts[current_section] = header_match.group(2)
+                continue
+
+            if current_section and line[:1] in ('+', '?', '-'):
                 # Parse entry: "+ Name - details" or "? Name - details"
                 entry = line[1:].strip()
+                if line[:1] == '-' and entry[:1] in ('+', '?', '-'):
+                    entry = entry[1:].strip()  # Markdown bullet around the marker
                 sections[current_section].append(entry)
 
         # Build formatted output
-        result += f"### ✅ Available ({sections.get('available_count', len(sections['available']))})\n\n"
+        parts.append(f"### ✅ Available ({counts.get('available', len(sections['available']))})\n\n")
         for entry in sections["available"]:
-            result += f"- {entry}\n"
+            parts.append(f"- {entry}\n")
         if not sections["available"]:
-            result += "_None_\n"
-        result += "\n"
+            parts.append("_None_\n")
+        parts.append("\n")
 
-        result += f"### ⚠️ Limited ({sections.get('limited_count', len(sections['limited']))})\n\n"
+        parts.append(f"### ⚠️ Limited ({counts.get('limited', len(sections['limited']))})\n\n")
         for entry in sections["limited"]:
-            result += f"- {entry}\n"
+            parts.append(f"- {entry}\n")
         if not sections["limited"]:
-            result += "_None_\n"
-        result += "\n"
+            parts.append("_None_\n")
+        parts.append("\n")
 
-        result += f"### ❌ Unavailable ({sections.get('unavailable_count', len(sections['unavailable']))})\n\n"
+        parts.append(f"### ❌ Unavailable ({counts.get('unavailable', len(sections['unavailable']))})\n\n")
         for entry in sections["unavailable"]:
-            result += f"- {entry}\n"
+            parts.append(f"- {entry}\n")
         if not sections["unavailable"]:
-            result += "_None_\n"
+            parts.append("_None_\n")
 
-        return result
+        return "".join(parts)
 
-    def _format_nurse_profile(self, text: str) -> str:
+    def _format_nurse_profile(self, text: str, lines: List[str]) -> str:
         """Format nurse profile with sections."""
         # Extract nurse name
-        name_match = re.search(r'NURSE PROFILE:\s*(\w+)', text, re.I)
+        name_match = _RE_PROFILE_NAME.search(text)
         name = name_match.group(1) if name_match else "Unknown"
 
-        result = f"## Nurse: {name}\n\n"
+        parts = [f"## Nurse: {name}\n\n"]
 
-        # Extract key-value pairs
-        def extract_value(pattern: str) -> str:
-            match = re.search(pattern, text, re.I)
-            return match.group(1).strip() if match else "N/A"
+        # Extract key-value pairs in one pass over the text
+        fields = _labelled_fields(text)
+        weekend = next((value for label, value in fields.items()
+                        if label.startswith("weekend shifts")), "N/A")
 
         # Basic Info section
-        result += "### Basic Info\n\n"
-        result += f"- **ID**: {extract_value(r'ID:\s*([^\n]+)')}\n"
-        result += f"- **Seniority**: {extract_value(r'Seniority:\s*([^\n]+)')}\n"
-        result += f"- **Contract**: {extract_value(r'Contract:\s*([^\n]+)')}\n"
-        result += f"- **Certifications**: {extract_value(r'Certifications:\s*([^\n]+)')}\n"
-        result += "\n"
+        parts.append("### Basic Info\n\n")
+        parts.append(f"- **ID**: {fields.get('id', 'N/A')}\n")
+        parts.append(f"- **Seniority**: {fields.get('seniority', 'N/A')}\n")
+        parts.append(f"- **Contract**: {fields.get('contract', 'N/A')}\n")
+        parts.append(f"- **Certifications**: {fields.get('certifications', 'N/A')}\n")
+        parts.append("\n")
 
         # Preferences section
-        result += "### Preferences\n\n"
-        result += f"- **Avoid Night Shifts**: {extract_value(r'Avoid night shifts:\s*([^\n]+)')}\n"
-        result += f"- **Preferred Days**: {extract_value(r'Preferred days:\s*([^\n]+)')}\n"
-        result += "\n"
+        parts.append("### Preferences\n\n")
+        parts.append(f"- **Avoid Night Shifts**: {fields.get('avoid night shifts', 'N/A')}\n")
+        parts.append(f"- **Preferred Days**: {fields.get('preferred days', 'N/A')}\n")
+        parts.append("\n")
 
         # Current Status section
-        result += "### Current Status\n\n"
-        result += f"- **Last Shift**: {extract_value(r'Last shift:\s*([^\n]+)')}\n"
-        result += f"- **Consecutive Shifts**: {extract_value(r'Consecutive shifts:\s*([^\n]+)')}\n"
-        result += f"- **Shifts (30d)**: {extract_value(r'Shifts \(30d\):\s*([^\n]+)')}\n"
-        result += f"- **Weekend Shifts**: {extract_value(r'Weekend shifts.*?:\s*([^\n]+)')}\n"
-        result += f"- **Fatigue**: {extract_value(r'Fatigue:\s*([^\n]+)')}\n"
+        parts.append("### Current Status\n\n")
+        parts.append(f"- **Last Shift**: {fields.get('last shift', 'N/A')}\n")
+        parts.append(f"- **Consecutive Shifts**: {fields.get('consecutive shifts', 'N/A')}\n")
+        parts.append(f"- **Shifts (30d)**: {fields.get('shifts (30d)', 'N/A')}\n")
+        parts.append(f"- **Weekend Shifts**: {weekend}\n")
+        parts.append(f"- **Fatigue**: {fields.get('fatigue', 'N/A')}\n")
 
-        return result
+        return "".join(parts)
 
-    def _format_staffing_summary(self, text: str) -> str:
+    def _format_staffing_summary(self, text: str, lines: List[str]) -> str:
         """Format staffing summary."""
-        result = "## Staffing Summary\n\n"
-
-        def extract_value(pattern: str) -> str:
-            match = re.search(pattern, text, re.I | re.S)
-            return match.group(1).strip() if match else "N/A"
+        parts = ["## Staffing Summary\n\n"]
 
         # Workforce stats
-        result += f"- **Total Nurses**: {extract_value(r'Total nurses:\s*(\d+)')}\n"
-        result += f"- **By Seniority**: {extract_value(r'By seniority:\s*([^\n]+)')}\n"
-        result += f"- **By Contract**: {extract_value(r'By contract:\s*([^\n]+)')}\n"
-        result += "\n"
+        fields = _labelled_fields(text)
+        parts.append(f"- **Total Nurses**: {fields.get('total nurses', 'N/A')}\n")
+        parts.append(f"- **By Seniority**: {fields.get('by seniority', 'N/A')}\n")
+        parts.append(f"- **By Contract**: {fields.get('by contract', 'N/A')}\n")
+        parts.append("\n")
 
         # Fatigue status
-        result += "### Fatigue Status\n\n"
-        good_match = re.search(r'\[OK\].*?Good:\s*(\d+)', text, re.I)
-        mod_match = re.search(r'\[MOD\].*?Moderate:\s*(\d+)', text, re.I)
-        high_match = re.search(r'\[HIGH\].*?High Risk:\s*(\d+)', text, re.I)
+        parts.append("### Fatigue Status\n\n")
+        good_match = _RE_SUMMARY_GOOD.search(text)
+        mod_match = _RE_SUMMARY_MODERATE.search(text)
+        high_match = _RE_SUMMARY_HIGH.search(text)
 
         good = good_match.group(1) if good_match else "0"
         moderate = mod_match.group(1) if mod_match else "0"
         high = high_match.group(1) if high_match else "0"
 
-        result += f"- 🟢 Good: {good} nurses\n"
-        result += f"- 🟡 Moderate: {moderate} nurses\n"
-        result += f"- 🔴 High Risk: {high} nurses\n"
-        result += "\n"
+        parts.append(f"- 🟢 Good: {good} nurses\n")
+        parts.append(f"- 🟡 Moderate: {moderate} nurses\n")
+        parts.append(f"- 🔴 High Risk: {high} nurses\n")
+        parts.append("\n")
 
         # Upcoming shifts
-        result += "### Upcoming Shifts\n\n"
-        total_shifts = extract_value(r'Total:\s*(\d+)\s*shifts')
-        result += f"- **Total**: {total_shifts} shifts\n"
+        parts.append("### Upcoming Shifts\n\n")
+        total_shifts_match = _RE_SUMMARY_TOTAL_SHIFTS.search(text)
+        total_shifts = total_shifts_match.group(1) if total_shifts_match else "N/A"
+        parts.append(f"- **Total**: {total_shifts} shifts\n")
 
-        icu_match = re.search(r'ICU:\s*(\d+)', text)
-        emergency_match = re.search(r'Emergency:\s*(\d+)', text)
-        general_match = re.search(r'General:\s*(\d+)', text)
+        icu_match = _RE_SUMMARY_ICU.search(text)
+        emergency_match = _RE_SUMMARY_EMERGENCY.search(text)
+        general_match = _RE_SUMMARY_GENERAL.search(text)
 
         if icu_match:
-            result += f"- **ICU**: {icu_match.group(1)}\n"
+            parts.append(f"- **ICU**: {icu_match.group(1)}\n")
         if emergency_match:
-            result += f"- **Emergency**: {emergency_match.group(1)}\n"
+            parts.append(f"- **Emergency**: {emergency_match.group(1)}\n")
         if general_match:
-            result += f"- **General**: {general_match.group(1)}\n"
-        result += "\n"
+            parts.append(f"- **General**: {general_match.group(1)}\n")
+        parts.append("\n")
 
         # Alerts
-        if re.search(r'ALERTS:', text, re.I):
-            result += "### ⚠️ Alerts\n\n"
+        upper_text = text.upper()
+        if "ALERTS:" in upper_text:
+            parts.append("### ⚠️ Alerts\n\n")
             # Extract alert lines
-            alerts_section = re.search(r'ALERTS:\s*(.*?)(?:\n\n|\Z)', text, re.I | re.S)
+            alerts_section = _RE_SUMMARY_ALERTS_SECTION.search(text)
             if alerts_section:
                 for line in alerts_section.group(1).split('\n'):
                     line = line.strip()
                     if line and not line.startswith('='):
-                        result += f"- {line}\n"
-        elif re.search(r'No staffing alerts', text, re.I):
-            result += "### ✅ No Alerts\n\n"
-            result += "_All staffing levels are healthy_\n"
+                        parts.append(f"- {line}\n")
+        elif "NO STAFFING ALERTS" in upper_text:
+            parts.append("### ✅ No Alerts\n\n")
+            parts.append("_All staffing levels are healthy_\n")
 
-        return result
+        return "".join(parts)
 
-    def _format_shifts_list(self, text: str) -> str:
+    def _format_shifts_list(self, text: str, lines: List[str]) -> str:
         """Format shifts list as table grouped by date."""
         # Extract header info
-        days_match = re.search(r'\((\d+)\s*days\)', text, re.I)
+        days_match = _RE_SHIFTS_DAYS.search(text)
         days = days_match.group(1) if days_match else "7"
 
-        result = f"## Shifts to Fill ({days} days)\n\n"
+        parts = [f"## Shifts to Fill ({days} days)\n\n"]
 
         # Parse shifts grouped by date
-        current_date = None
-        shifts = []
-
-        for line in text.split('\n'):
-            line = line.strip()
+        current_date: Optional[str] = None
+        shifts: List[Dict[str, str]] = []
 
+        # The patterns are unanchored, so lines are searched unstripped and
+        # each pattern only runs on lines containing its literal part
+        for line in lines:
             # Date header: "📆 2025-12-04 (Wednesday)"
-            date_match = re.search(r'(\d{4}-\d{2}-\d{2})\s*\((\w+)\)', line)
+            date_match = _RE_DATE_WITH_DAY.search(line) if '(' in line else None
             if date_match:
                 current_date = f"{date_match.group(1)} ({date_match.group(2)})"
                 continue
 
             # Shift entry: "📅 shift_001: ICU Ward"
-            shift_match = re.search(r'(shift_\d+):\s*(\w+)\s*Ward', line)
+            shift_match = _RE_SHIFT_ENTRY.search(line) if 'shift_' in line else None
             if shift_match and current_date:
                 shift_id = shift_match.group(1)
                 ward = shift_match.group(2)
@@ -524,13 +653,13 @@ class OutputFormatter:
                 continue
 
             # Time line: "Time: 08:00 - 16:00"
-            time_match = re.search(r'Time:\s*(\d{2}:\d{2})\s*-\s*(\d{2}:\d{2})', line)
+            time_match = _RE_SHIFT_TIME.search(line) if 'Time:' in line else None
             if time_match and shifts:
                 shifts[-1]["time"] = f"{time_match.group(1)}-{time_match.group(2)}"
                 continue
 
             # Requirements line: "Required: ICU | Min Level: Senior"
-            req_match = re.search(r'Required:\s*([^|]+)\|\s*Min Level:\s*(\w+)', line)
+            req_match = _RE_SHIFT_REQUIREMENTS.search(line) if 'Required:' in line else None
             if req_match and shifts:
                 shifts[-1]["certs"] = req_match.group(1).strip()
                 shifts[-1]["level"] = req_match.group(2).strip()
@@ -539,57 +668,67 @@ class OutputFormatter:
             return text  # Couldn't parse
 
         # Build table
-        result += "| Date | Shift | Ward | Time | Certs | Level |\n"
-        result += "|------|-------|------|------|-------|-------|\n"
+        parts.append("| Date | Shift | Ward | Time | Certs | Level |\n")
+        parts.append("|------|-------|------|------|-------|-------|\n")
 
-        prev_date = None
+        prev_date: Optional[str] = None
         for s in shifts:
             date_display = s["date"] if s["date"] != prev_date else ""
             prev_date = s["date"]
-            result += f"| {date_display} | {s['id']} | {s['ward']} | {s['time']} | {s['certs']} | {s['level']} |\n"
+            parts.append(f"| {date_display} | {s['id']} | {s['ward']} | {s['time']} | {s['certs']} | {s['level']} |\n")
 
         # Total
-        total_match = re.search(r'Total shifts:\s*(\d+)', text, re.I)
+        total_match = _RE_TOTAL_SHIFTS.search(text)
         if total_match:
-            result += f"\n**Total: {total_match.group(1)} shifts**"
+            parts.append(f"\n**Total: {total_match.group(1)} shifts**")
 
-        return result
+        return "".join(parts)
 
-    def _format_pending_rosters(self, text: str) -> str:
+    def _format_pending_rosters(self, text: str, lines: List[str]) -> str:
         """Format pending rosters list."""
-        result = "## Pending Rosters\n\n"
+        parts = ["## Pending Rosters\n\n"]
 
         # Parse roster entries
-        rosters = []
-        current_roster = {}
+        rosters: List[Dict[str, str]] = []
+        current_roster: Dict[str, str] = {}
 
-        for line in text.split('\n'):
+        # Each pattern only runs on lines containing its literal part
+        for line in lines:
             line = line.strip()
+            if not line:
+                continue
 
             # Roster ID line
-            roster_match = re.search(r'(roster_\w+)', line)
-            if roster_match and not line.startswith('Period'):
-                if current_roster:
-                    rosters.append(current_roster)
-                current_roster = {"id": roster_match.group(1)}
+            if 'roster_' in line and not line.startswith('Period'):
+                roster_match = _RE_PENDING_ROSTER_ID.search(line)
+                if roster_match:
+                    if current_roster:
+                        rosters.append(current_roster)
+                    current_roster = {"id": roster_match.group(1)}
+                    continue
+
+            if not current_roster:
                 continue
 
             # Period line
-            period_match = re.search(r'Period:\s*(\S+)\s*to\s*(\S+)', line)
-            if period_match and current_roster:
-                current_roster["period"] = f"{period_match.group(1)} to {period_match.group(2)}"
-                continue
+            if 'Period:' in line:
+                period_match = _RE_PENDING_PERIOD.search(line)
+                if period_match:
+                    current_roster["period"] = f"{period_match.group(1)} to {period_match.group(2)}"
+                    continue
 
             # Generated line
-            gen_match = re.search(r'Generated:\s*(.+)', line)
-            if gen_match and current_roster:
-                current_roster["generated"] = gen_match.group(1)
-                continue
+            if 'Generated:' in line:
+                gen_match = _RE_PENDING_GENERATED.search(line)
+                if gen_match:
+                    current_roster["generated"] = gen_match.group(1)
+                    continue
 
             # Assignments line
-            assign_match = re.search(r'Assignments:\s*(\d+)', line)
-            if assign_match and current_roster:
-                current_roster["assignments"] = assign_match.group(1)
+            if 'Assignments:' in line:
+                assign_match = _RE_PENDING_ASSIGNMENTS.search(line)
+                if assign_match:
+                    current_roster["assignments"] = assign_match.group(1)
 
         if current_roster:
             rosters.append(current_roster)
@@ -598,13 +737,13 @@ class OutputFormatter:
             return "## Pending Rosters\n\n_No pending rosters_\n"
 
         # Build table
-        result += "| Roster ID | Period | Assignments | Generated |\n"
-        result += "|-----------|--------|-------------|----------|\n"
+        parts.append("| Roster ID | Period | Assignments | Generated |\n")
+        parts.append("|-----------|--------|-------------|----------|\n")
 
         for r in rosters:
-            result += f"| {r.get('id', '')} | {r.get('period', '')} | {r.get('assignments', '')} | {r.get('generated', '')[:10] if r.get('generated') else ''} |\n"
+            parts.append(f"| {r.get('id', '')} | {r.get('period', '')} | {r.get('assignments', '')} | {r.get('generated', '')[:10] if r.get('generated') else ''} |\n")
 
-        result += f"\n**Total: {len(rosters)} pending**\n"
-        result += "\n_Use `finalize_roster(id)` to approve or `reject_roster(id)` to reject_"
+        parts.append(f"\n**Total: {len(rosters)} pending**\n")
+        parts.append("\n_Use `finalize_roster(id)` to approve or `reject_roster(id)` to reject_")
 
-        return result
+        return "".join(parts)
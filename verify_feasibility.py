@@ -23,7 +23,9 @@ def verify_roster_feasibility():
     from tools.data_loader import generate_shifts
     start_date = datetime.strptime("2025-12-08", "%Y-%m-%d")
     shifts = generate_shifts(start_date=start_date, num_days=7)
-    shifts_map = {s["id"]: s for s in shifts}
+    # Only Fiona's shifts are looked up
+    wanted = {a["shift_id"] for a in fiona_shifts}
+    shifts_map = {s["id"]: s for s in shifts if s["id"] in wanted}
     
     print(f"\nFiona ({fiona_id}) Assignments:")
     for a in fiona_shifts: